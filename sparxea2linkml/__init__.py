@@ -1,18 +1,19 @@
 import os
 import sqlite3
 import textwrap
-import urllib.parse
 from itertools import groupby
-from operator import itemgetter, attrgetter
+from operator import itemgetter
 from collections.abc import Iterable, Iterator
 from pprint import pprint
-from typing import Literal
+from typing import TYPE_CHECKING, Literal
 
-from linkml_runtime.utils.schema_as_dict import schema_as_yaml_dump
-from linkml_runtime.utils.formatutils import uncamelcase, underscore
-from linkml_runtime import linkml_model
+from sparxea2linkml import cache, compiled, ea_model, naming, qea
 
-from sparxea2linkml import ea_model
+if TYPE_CHECKING:
+    from linkml_runtime import linkml_model
+
+# `linkml_runtime` takes about a second to import, and this module is imported
+# by every submodule (the CLI too), so it is only imported where it is used.
 
 YAMLFilePath = os.PathLike | str
 URI = str
@@ -80,8 +81,8 @@ def read_uml_relations(conn: sqlite3.Connection) -> sqlite3.Cursor:
 #                     ),
 #                     slot_uri=generate_curie("cim", f"{uml_class.name}.{attr.name}"),
 #                 )
-#                 for attr in uml_class.attributes.values()
-#                 if attr.id is not None and (range_class := uml_classes_by_name[attr.type])
+#                 for attr in uml_class.attributes
+#                 if attr.id is not None and (range_class := uml_model.classes_by_name[attr.type])
 #             }
 
 #             class_.attributes = (attributes,)
@@ -99,8 +100,8 @@ def read_uml_relations(conn: sqlite3.Connection) -> sqlite3.Cursor:
 #             ),
 #             slot_uri=generate_curie("cim", f"{uml_class.name}.{attr.name}"),
 #         )
-#         for attr in uml_class.attributes.values()
-#         if attr.id is not None and (range_class := uml_classes_by_name[attr.type])
+#         for attr in uml_class.attributes
+#         if attr.id is not None and (range_class := uml_model.classes_by_name[attr.type])
 #     }
 
 #     class_ = linkml_model.ClassDefinition(
@@ -153,39 +154,33 @@ def parse_uml_classes(
         if not rows:
             return
 
+        # Classes without attributes come with a single row of `NULL`s for them.
         uml_class = ea_model.UMLClass(
             id=object_id,
-            name=rows[0][1],
+            name=ea_model.intern(rows[0][1]),
             note=rows[0][2],
             package_id=rows[0][3],
-            attributes={
-                row[5]: ea_model.UMLAttribute(
+            attributes=tuple(
+                ea_model.UMLAttribute(
                     id=row[5],
-                    name=row[6],
+                    name=ea_model.intern(row[6]),
                     lower_bound=int(row[7]) if row[7] is not None else 0,
                     upper_bound=int(row[8]) if row[8] is not None else 1,
-                    type=row[9],
+                    type=ea_model.intern(row[9]),
                     note=row[10],
-                    stereotype=row[11],
+                    stereotype=ea_model.intern(row[11]),
                 )
                 for row in rows
-            },
-            stereotype=rows[0][4],
+                if row[5] is not None
+            ),
+            stereotype=ea_model.intern(rows[0][4]),
         )
 
         yield object_id, uml_class
 
 
 def parse_cardinality_value(val: tuple[str, str] | None) -> ea_model.UMLCardinality:
-    if val is None:
-        return None
-
-    lower, _, upper = val.partition("..")
-
-    if upper == "":
-        upper = lower
-
-    return tuple(map(lambda v: ea_model.MANY if v in ["n", "*"] else int(v), (lower, upper)))
+    return naming.parse_cardinality(val)
 
 
 def map_connector_type(val: str) -> ea_model.UMLRelationType:
@@ -261,21 +256,17 @@ def parse_uml_relations(
             connector_type=map_connector_type(row[0]),
             start_object_id=start_object_id,
             source_card=parse_cardinality_value(row[2]),
-            source_role=row[3],
+            source_role=ea_model.intern(row[3]),
             source_role_note=row[4],
             end_object_id=row[5],
             dest_card=parse_cardinality_value(row[6]),
-            dest_role=row[7],
+            dest_role=ea_model.intern(row[7]),
             dest_role_note=row[8],
         )
 
         yield start_object_id, uml_relation
 
 
-def generate_curie(prefix: str, local_name: str) -> CURIE:
-    return f"{prefix}:{urllib.parse.quote(local_name)}"
-
-
 def map_primitive_data_type(val: str) -> LinkMLTypes:
     match val:
         case "Float":
@@ -303,9 +294,10 @@ def map_primitive_data_type(val: str) -> LinkMLTypes:
 
 
 def build_schema(
-    uml_classes: Iterator[tuple[ea_model.ObjectID, ea_model.UMLClass]],
-    uml_relations: Iterator[tuple[ea_model.ObjectID, ea_model.UMLRelation]],
-) -> linkml_model.SchemaDefinition:
+    uml_classes: Iterable[tuple[ea_model.ObjectID, ea_model.UMLClass]],
+    uml_relations: Iterable[tuple[ea_model.ObjectID, ea_model.UMLRelation]],
+) -> "linkml_model.SchemaDefinition":
+    from linkml_runtime import linkml_model
     schema = linkml_model.SchemaDefinition(
         id="http://w3id.org/cim",
         name="cim",
@@ -313,15 +305,11 @@ def build_schema(
         prefixes={"cim": "https://cim.ucaiug.io/ns#", "linkml": "https://w3id.org/linkml/"},
         default_prefix="cim",
     )
-    uml_classes: dict[ea_model.ObjectID, ea_model.UMLClass] = {
-        object_id: uml_class for object_id, uml_class in uml_classes
-    }
-    uml_classes_by_name = {
-        name: next(class_) for name, class_ in groupby(uml_classes.values(), attrgetter("name"))
-    }
-    uml_relations: list[ea_model.UMLRelation] = list(r for _, r in uml_relations)
+    # Relations are resolved in a single pass over `uml_relations`, after all
+    # classes are indexed, so they can be streamed from the database.
+    uml_model = ea_model.UMLModel.from_classes(uml_classes)
 
-    for uml_class in uml_classes.values():
+    for uml_class in uml_model.classes_by_id.values():
         match uml_class.stereotype:
             case "Primitive":
                 continue
@@ -330,22 +318,21 @@ def build_schema(
             case "enumeration":
                 enum_class = linkml_model.EnumDefinition(
                     name=uml_class.name,
-                    enum_uri=generate_curie("cim", uml_class.name),
+                    enum_uri=naming.generate_curie("cim", uml_class.name),
                     permissible_values={
                         attr.name: linkml_model.PermissibleValue(
                             text=attr.name,
-                            meaning=generate_curie("cim", f"{uml_class.name}.{attr.name}"),
+                            meaning=naming.generate_curie("cim", uml_class.name, attr.name),
                         )
-                        for attr in uml_class.attributes.values()
-                        if attr.id is not None
+                        for attr in uml_class.attributes
                     },
                 )
                 enum_class._ea_object_id = uml_class.id
                 schema.enums[uml_class.name] = enum_class
             case None | _:
                 attributes = {
-                    underscore(uncamelcase(attr.name)): linkml_model.SlotDefinition(
-                        name=underscore(uncamelcase(attr.name)),
+                    naming.slot_name(attr.name): linkml_model.SlotDefinition(
+                        name=naming.slot_name(attr.name),
                         range=(
                             map_primitive_data_type(attr.type)
                             if range_class.stereotype == "Primitive"
@@ -353,25 +340,23 @@ def build_schema(
                         ),
                         required=True if attr.lower_bound > 1 else False,
                         multivalued=True if attr.upper_bound > 1 else False,
-                        slot_uri=generate_curie("cim", f"{uml_class.name}.{attr.name}"),
+                        slot_uri=naming.generate_curie("cim", uml_class.name, attr.name),
                     )
-                    for attr in uml_class.attributes.values()
-                    if attr.id is not None and (range_class := uml_classes_by_name[attr.type])
+                    for attr in uml_class.attributes
+                    if attr.id is not None and (range_class := uml_model.classes_by_name[attr.type])
                 }
 
                 class_ = linkml_model.ClassDefinition(
                     name=uml_class.name,
-                    class_uri=generate_curie("cim", uml_class.name),
+                    class_uri=naming.generate_curie("cim", uml_class.name),
                     attributes=attributes,
                 )
                 class_._ea_object_id = uml_class.id
                 schema.classes[uml_class.name] = class_
 
-    classes_by_ea_obj_id = {
-        k: next(v) for k, v in groupby(schema.classes.values(), attrgetter("_ea_object_id"))
-    }
+    classes_by_ea_obj_id = {class_._ea_object_id: class_ for class_ in schema.classes.values()}
 
-    for uml_relation in uml_relations:
+    for _, uml_relation in uml_relations:
         try:
             # Assumptions: only non-enum classes have relations.
             source_class, dest_class = itemgetter(
@@ -391,11 +376,11 @@ def build_schema(
                 # Source end
                 role_name = uml_relation.dest_role if uml_relation.dest_role else dest_class.name
                 source_attr = linkml_model.SlotDefinition(
-                    name=underscore(uncamelcase(role_name)),
+                    name=naming.slot_name(role_name),
                     range=dest_class.name,
                     required=True if uml_relation.source_card[0] > 1 else False,
                     multivalued=True if uml_relation.source_card[1] > 1 else False,
-                    slot_uri=generate_curie("cim", f"{source_class.name}.{role_name}"),
+                    slot_uri=naming.generate_curie("cim", source_class.name, role_name),
                 )
                 source_class.attributes[source_attr.name] = source_attr
 
@@ -404,33 +389,171 @@ def build_schema(
                     uml_relation.source_role if uml_relation.source_role else source_class.name
                 )
                 dest_attr = linkml_model.SlotDefinition(
-                    name=underscore(uncamelcase(role_name)),
+                    name=naming.slot_name(role_name),
                     range=source_class.name,
                     required=True if uml_relation.source_card[0] > 1 else False,
                     multivalued=True if uml_relation.source_card[1] > 1 else False,
-                    slot_uri=generate_curie("cim", f"{dest_class.name}.{role_name}"),
+                    slot_uri=naming.generate_curie("cim", dest_class.name, role_name),
                 )
                 dest_class.attributes[dest_attr.name] = dest_attr
 
     return schema
 
 
-def write_schema(schema: linkml_model.SchemaDefinition, output: YAMLFilePath):
-    with open(output, "w") as f:
-        f.write(schema_as_yaml_dump(schema))
+def build_schema_dict(
+    uml_classes: Iterable[tuple[ea_model.ObjectID, ea_model.UMLClass]],
+    uml_relations: Iterable[tuple[ea_model.ObjectID, ea_model.UMLRelation]],
+) -> dict:
+    # Same schema as `build_schema`, but as plain dicts shaped like the output
+    # of `json_dumper.to_dict`. Keys follow the field order of the LinkML
+    # metamodel classes, and empty values are left for the emitter to drop.
+    schema = {
+        "name": "cim",
+        "title": "CIM",
+        "id": "http://w3id.org/cim",
+        "prefixes": {"cim": "https://cim.ucaiug.io/ns#", "linkml": "https://w3id.org/linkml/"},
+        "default_prefix": "cim",
+        "enums": {},
+        "classes": {},
+    }
+    # Relations are resolved in a single pass over `uml_relations`, after all
+    # classes are indexed, so they can be streamed from the database.
+    uml_model = ea_model.UMLModel.from_classes(uml_classes)
 
+    for uml_class in uml_model.classes_by_id.values():
+        match uml_class.stereotype:
+            case "Primitive":
+                continue
+            case "enumeration":
+                schema["enums"][uml_class.name] = {
+                    "name": uml_class.name,
+                    "enum_uri": naming.generate_curie("cim", uml_class.name),
+                    "permissible_values": {
+                        attr.name: {
+                            "text": attr.name,
+                            "meaning": naming.generate_curie("cim", uml_class.name, attr.name),
+                        }
+                        for attr in uml_class.attributes
+                    },
+                    "_ea_object_id": uml_class.id,
+                }
+            case None | _:
+                schema["classes"][uml_class.name] = {
+                    "name": uml_class.name,
+                    "is_a": None,
+                    "attributes": {
+                        naming.slot_name(attr.name): {
+                            "name": naming.slot_name(attr.name),
+                            "slot_uri": naming.generate_curie("cim", uml_class.name, attr.name),
+                            "range": (
+                                map_primitive_data_type(attr.type)
+                                if range_class.stereotype == "Primitive"
+                                else attr.type
+                            ),
+                            "required": True if attr.lower_bound > 1 else False,
+                            "multivalued": True if attr.upper_bound > 1 else False,
+                        }
+                        for attr in uml_class.attributes
+                        if attr.id is not None and (range_class := uml_model.classes_by_name[attr.type])
+                    },
+                    "class_uri": naming.generate_curie("cim", uml_class.name),
+                    "_ea_object_id": uml_class.id,
+                }
+
+    classes_by_ea_obj_id = {class_["_ea_object_id"]: class_ for class_ in schema["classes"].values()}
 
-def generate_schema(cim_db: ea_model.QEAProjectFile) -> None:
-    conn = sqlite3.connect(cim_db)
+    for _, uml_relation in uml_relations:
+        try:
+            source_class, dest_class = itemgetter(
+                uml_relation.start_object_id, uml_relation.end_object_id
+            )(classes_by_ea_obj_id)
+        except KeyError:
+            continue
+
+        match uml_relation.connector_type:
+            case ea_model.UMLRelationType.GENERALIZATION:
+                source_class["is_a"] = dest_class["name"]
+                continue
+            case _:
+                role_name = uml_relation.dest_role if uml_relation.dest_role else dest_class["name"]
+                slot_name = naming.slot_name(role_name)
+                source_class["attributes"][slot_name] = {
+                    "name": slot_name,
+                    "slot_uri": naming.generate_curie("cim", source_class["name"], role_name),
+                    "range": dest_class["name"],
+                    "required": True if uml_relation.source_card[0] > 1 else False,
+                    "multivalued": True if uml_relation.source_card[1] > 1 else False,
+                }
+
+                role_name = (
+                    uml_relation.source_role if uml_relation.source_role else source_class["name"]
+                )
+                slot_name = naming.slot_name(role_name)
+                dest_class["attributes"][slot_name] = {
+                    "name": slot_name,
+                    "slot_uri": naming.generate_curie("cim", dest_class["name"], role_name),
+                    "range": source_class["name"],
+                    "required": True if uml_relation.source_card[0] > 1 else False,
+                    "multivalued": True if uml_relation.source_card[1] > 1 else False,
+                }
+
+    return schema
+
+
+def write_schema(schema: "linkml_model.SchemaDefinition | dict", output: YAMLFilePath, with_compiled=False):
+    from sparxea2linkml import emitter
+
+    document = {} if with_compiled else None
+    with open(output, "w") as f:
+        if isinstance(schema, dict):
+            emitter.dump_schema_dict(schema, f, document)
+        else:
+            emitter.dump_schema(schema, f, document)
+
+    if with_compiled:
+        with open(compiled.compiled_path(output), "wb") as f:
+            f.write(compiled.dumps(document, output))
+
+
+def read_model(
+    cim_db: ea_model.QEAProjectFile,
+    cache_dir: cache.CacheDir | None = None,
+    access: qea.AccessMode = "readonly",
+) -> tuple[
+    Iterable[tuple[ea_model.ObjectID, ea_model.UMLClass]],
+    Iterable[tuple[ea_model.ObjectID, ea_model.UMLRelation]],
+]:
+    if cache_dir is not None:
+        cache_key = cache.model_cache_key(cim_db, "model")
+        cached_model = cache.load_model(cache_dir, cache_key)
+
+        if cached_model is not None:
+            return cached_model
+
+    conn = qea.connect(cim_db, access)
     uml_class_rows = read_uml_classes(conn)
     uml_classes = parse_uml_classes(uml_class_rows)
     uml_relation_rows = read_uml_relations(conn)
     uml_relations = parse_uml_relations(uml_relation_rows)
-    schema = build_schema(uml_classes, uml_relations)
-    write_schema(schema, "out.yml")
 
-
-if __name__ == "__main__":
-    generate_schema(
-        cim_db="data/iec61970cim17v40_iec61968cim13v13b_iec62325cim03v17b_CIM100.1.1.1.qea"
-    )
+    if cache_dir is not None:
+        uml_classes, uml_relations = list(uml_classes), list(uml_relations)
+        cache.store_model(cache_dir, cache_key, (uml_classes, uml_relations))
+
+    return uml_classes, uml_relations
+
+
+def generate_schema(
+    cim_db: ea_model.QEAProjectFile,
+    cache_dir: cache.CacheDir | None = None,
+    validate=False,
+    output: YAMLFilePath = "out.yml",
+    access: qea.AccessMode = "readonly",
+    with_compiled=False,
+) -> None:
+    uml_classes, uml_relations = read_model(cim_db, cache_dir, access)
+    if validate:
+        schema = build_schema(uml_classes, uml_relations)
+    else:
+        schema = build_schema_dict(uml_classes, uml_relations)
+    write_schema(schema, output, with_compiled)
@@ -0,0 +1,5 @@
+import sys
+
+from sparxea2linkml import cli
+
+sys.exit(cli.main())
@@ -0,0 +1,404 @@
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import textwrap
+import time
+from collections.abc import Callable, Iterable
+from datetime import datetime, timezone
+from itertools import groupby
+from operator import itemgetter
+from typing import Literal
+
+import sparxea2linkml
+from sparxea2linkml import ea_model, main, qea, synthetic
+
+ResultsFilePath = os.PathLike | str
+Pipeline = Literal["rows", "model"]
+StageTimings = dict[str, float | None]  # Median seconds per stage
+
+STAGES = ("query", "parse", "build_schema", "write_schema")
+DEFAULT_RESULTS_FILE = "benchmark.json"
+DEFAULT_THRESHOLD = 1.25
+
+# `read_uml_classes` as it was before its lookups were joins, with a correlated
+# subquery per lookup and `UNION` to deduplicate. Its rows are the reference
+# that those of `read_uml_classes` are compared (and timed) against.
+SUBQUERY_UML_CLASSES_QUERY = textwrap.dedent(
+    """
+    SELECT
+        Class.Object_ID AS ClassID,
+        Class.Name AS ClassName,
+        Class.Package_ID AS ClassPackageID,
+        Class.Stereotype AS ClassStereotype,
+        Class.Note AS ClassDescription,
+        Attribute.AttrID AS AttrID,
+        Attribute.RelID AS RelID,
+        Attribute.Name AS AttrName,
+        Attribute.Cardinality AS AttrCardinality,
+        Attribute.Range AS AttrRange,
+        Attribute.Description AS AttrDescription,
+        Attribute.RelationType AS AttrRelationType,
+        Attribute.Stereotype AS AttrStereotype,
+        Attribute.RangeStereotype AS AttrRangeStereotype
+    FROM t_object AS Class
+
+    LEFT JOIN (
+        SELECT
+            Attr.ID AS AttrID,
+            NULL AS RelID,
+            Attr.Object_ID AS Object_ID,
+            Attr.Name AS Name,
+            Attr.LowerBound || ".." || Attr.UpperBound AS Cardinality,
+            Attr.Type AS Range,
+            Attr.Notes AS Description,
+            NULL AS RelationType,
+            Attr.Stereotype AS Stereotype,
+            (SELECT C_.Stereotype FROM t_object AS C_ WHERE Attr.Type = C_.Name) AS RangeStereotype
+        FROM t_attribute AS Attr
+
+        UNION
+
+        SELECT
+            NULL AS AttrID,
+            RelationFrom.Connector_ID AS RelID,
+            RelationFrom.Start_Object_ID AS Object_ID,
+            COALESCE(
+                RelationFrom.DestRole,
+                (SELECT C_.Name FROM t_object AS C_ WHERE RelationFrom.End_Object_ID = C_.Object_ID)
+            ) AS Name,
+            RelationFrom.DestCard AS Cardinality,
+            (SELECT C_.Name FROM t_object AS C_ WHERE RelationFrom.End_Object_ID = C_.Object_ID) AS Range,
+            RelationFrom.Notes AS Description,
+            RelationFrom.Connector_Type AS RelationType,
+            RelationFrom.Stereotype AS Stereotype,
+            (
+                SELECT C_.Stereotype FROM t_object AS C_ WHERE RelationFrom.End_Object_ID = C_.Object_ID
+            ) AS RangeStereotype
+        FROM t_connector AS RelationFrom
+
+        UNION
+
+        SELECT
+            NULL AS AttrID,
+            RelationTo.Connector_ID AS RelID,
+            RelationTo.End_Object_ID AS Object_ID,
+            COALESCE(
+                RelationTo.SourceRole,
+                (SELECT C_.Name FROM t_object AS C_ WHERE RelationTo.Start_Object_ID = C_.Object_ID)
+            ) AS Name,
+            RelationTo.SourceCard AS Cardinality,
+            (SELECT C_.Name FROM t_object AS C_ WHERE RelationTo.Start_Object_ID = C_.Object_ID) AS Range,
+            RelationTo.Notes AS Description,
+            RelationTo.Connector_Type AS RelationType,
+            RelationTo.Stereotype AS Stereotype,
+            (
+                SELECT C_.Stereotype FROM t_object AS C_ WHERE RelationTo.End_Object_ID = C_.Object_ID
+            ) AS RangeStereotype
+        FROM t_connector AS RelationTo
+        WHERE RelationTo.Connector_Type != "Generalization"
+
+    ) AS Attribute
+
+    ON Class.Object_ID = Attribute.Object_ID
+    WHERE Class.Object_Type = "Class"
+    ORDER BY Class.Object_ID, AttrID, RelID
+    """
+)
+
+
+def run_rows_pipeline(
+    cim_db: ea_model.QEAProjectFile, out_dir: str, validate: bool, access: qea.AccessMode
+) -> StageTimings:
+    # The `main` pipeline in schema-per-package mode.
+    timings = {}
+
+    start = time.perf_counter()
+    conn = qea.connect(cim_db, access)
+    uml_class_rows = list(main.read_uml_classes(conn))
+    package_rows = list(main.read_packages(conn))
+    conn.close()
+    timings["query"] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    packages_by_id = {pkg_id: next(pkg) for pkg_id, pkg in groupby(package_rows, itemgetter("Package_ID"))}
+    uml_class_rows_by_package = main.group_rows_by_package(uml_class_rows)
+    package_tree = main.PackageTree(packages_by_id)
+    package_paths = {
+        package_id: package_tree.path(package_id)
+        for package_id in uml_class_rows_by_package
+        if package_id in package_tree
+    }
+    timings["parse"] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    build = main.build_schema if validate else main.build_schema_dict
+    schemas = [
+        build(uml_class_rows_by_package[package_id], packages_by_id[package_id], pkg_path_parts)
+        for package_id, pkg_path_parts in package_paths.items()
+        if pkg_path_parts
+    ]
+    timings["build_schema"] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for i, schema in enumerate(schemas):
+        main.write_schema(schema, os.path.join(out_dir, f"{i}.yml"))
+    timings["write_schema"] = time.perf_counter() - start
+
+    return timings
+
+
+def run_model_pipeline(
+    cim_db: ea_model.QEAProjectFile, out_dir: str, validate: bool, access: qea.AccessMode
+) -> StageTimings:
+    # The package pipeline, which builds one schema from `ea_model` objects.
+    timings = {}
+
+    start = time.perf_counter()
+    conn = qea.connect(cim_db, access)
+    uml_class_rows = list(sparxea2linkml.read_uml_classes(conn))
+    uml_relation_rows = list(sparxea2linkml.read_uml_relations(conn))
+    conn.close()
+    timings["query"] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    uml_classes = list(sparxea2linkml.parse_uml_classes(uml_class_rows))
+    uml_relations = list(sparxea2linkml.parse_uml_relations(uml_relation_rows))
+    timings["parse"] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    build = sparxea2linkml.build_schema if validate else sparxea2linkml.build_schema_dict
+    schema = build(uml_classes, uml_relations)
+    timings["build_schema"] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    sparxea2linkml.write_schema(schema, os.path.join(out_dir, "out.yml"))
+    timings["write_schema"] = time.perf_counter() - start
+
+    return timings
+
+
+PIPELINES: dict[Pipeline, Callable[[ea_model.QEAProjectFile, str, bool, qea.AccessMode], StageTimings]] = {
+    "rows": run_rows_pipeline,
+    "model": run_model_pipeline,
+}
+
+
+def benchmark(
+    cim_db: ea_model.QEAProjectFile,
+    pipeline: Pipeline,
+    repeat: int = 5,
+    validate=False,
+    access: qea.AccessMode = "readonly",
+) -> StageTimings:
+    runs = []
+    for _ in range(repeat):
+        with tempfile.TemporaryDirectory() as out_dir:
+            runs.append(PIPELINES[pipeline](cim_db, out_dir, validate, access))
+
+    return {stage: statistics.median(run[stage] for run in runs) for stage in STAGES}
+
+
+def evict_page_cache(path: os.PathLike | str) -> bool:
+    # Drops the file from the OS page cache, so the next read is cold. Only
+    # possible where `posix_fadvise` is (so not on macOS or Windows).
+    if not hasattr(os, "posix_fadvise"):
+        return False
+
+    fd = os.open(path, os.O_RDONLY)
+    try:
+        os.fsync(fd)
+        os.posix_fadvise(fd, 0, 0, os.POSIX_FADV_DONTNEED)
+    finally:
+        os.close(fd)
+
+    return True
+
+
+def time_read(cim_db: ea_model.QEAProjectFile, access: qea.AccessMode) -> float:
+    # The `query` stage of the `rows` pipeline.
+    start = time.perf_counter()
+    conn = qea.connect(cim_db, access)
+    list(main.read_uml_classes(conn))
+    list(main.read_packages(conn))
+    conn.close()
+
+    return time.perf_counter() - start
+
+
+def time_query(read: Callable[[], Iterable], repeat: int = 5) -> float:
+    # Median seconds to fetch all rows.
+    runs = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        list(read())
+        runs.append(time.perf_counter() - start)
+
+    return statistics.median(runs)
+
+
+def benchmark_query(cim_db: ea_model.QEAProjectFile, repeat: int = 5) -> StageTimings:
+    # `read_uml_classes` before ("subqueries") and after ("joins") its lookups
+    # became joins, on the same connection.
+    conn = qea.connect(cim_db)
+    try:
+        return {
+            "subqueries": time_query(lambda: conn.execute(SUBQUERY_UML_CLASSES_QUERY), repeat),
+            "joins": time_query(lambda: main.read_uml_classes(conn), repeat),
+        }
+    finally:
+        conn.close()
+
+
+def benchmark_access(cim_db: ea_model.QEAProjectFile, repeat: int = 5) -> StageTimings:
+    # Cold and warm read times per access mode, like "immutable_cold".
+    runs = []
+    for _ in range(repeat):
+        run = {}
+        for access in qea.ACCESS_MODES:
+            cold = evict_page_cache(cim_db)
+            run[f"{access}_cold"] = time_read(cim_db, access) if cold else None
+            run[f"{access}_warm"] = time_read(cim_db, access)
+        runs.append(run)
+
+    return {
+        key: None if runs[0][key] is None else statistics.median(run[key] for run in runs)
+        for key in runs[0]
+    }
+
+
+def git_revision() -> str | None:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=os.path.dirname(__file__),
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def read_results(results_path: ResultsFilePath) -> list[dict]:
+    try:
+        with open(results_path) as f:
+            return json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return []
+
+
+def write_results(results_path: ResultsFilePath, results: list[dict]) -> None:
+    with open(results_path, "w") as f:
+        json.dump(results, f, indent=2)
+
+
+def find_regressions(
+    timings: StageTimings, baseline: StageTimings, threshold: float = DEFAULT_THRESHOLD
+) -> dict[str, float]:
+    # Stages that got slower than `threshold` times their baseline, by ratio.
+    return {
+        stage: timings[stage] / baseline[stage]
+        for stage in timings
+        if timings[stage] is not None
+        and baseline.get(stage)
+        and timings[stage] / baseline[stage] > threshold
+    }
+
+
+def run(args: argparse.Namespace) -> int:
+    config = {
+        "pipeline": "access" if args.compare_access else "query" if args.compare_query else args.pipeline,
+        "validate": args.validate,
+        "access": args.access,
+        "classes": args.classes,
+        "attributes_per_class": args.attributes_per_class,
+        "connectors": args.connectors,
+        "packages": args.packages,
+        "package_depth": args.package_depth,
+        "seed": args.seed,
+    }
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        cim_db = os.path.join(tmp_dir, "synthetic.qea")
+        synthetic.generate_qea(
+            cim_db,
+            classes=args.classes,
+            attributes_per_class=args.attributes_per_class,
+            connectors=args.connectors,
+            packages=args.packages,
+            package_depth=args.package_depth,
+            seed=args.seed,
+        )
+        if args.compare_access:
+            timings = benchmark_access(cim_db, args.repeat)
+        elif args.compare_query:
+            timings = benchmark_query(cim_db, args.repeat)
+        else:
+            timings = benchmark(cim_db, args.pipeline, args.repeat, args.validate, args.access)
+
+    for stage, seconds in timings.items():
+        if seconds is None:
+            print(f"{stage:<18}{'n/a':>10}")
+        else:
+            print(f"{stage:<18}{seconds * 1000:10.1f} ms")
+
+    # Only runs of the same configuration are comparable.
+    results = read_results(args.results)
+    baseline = next((result for result in reversed(results) if result["config"] == config), None)
+
+    exit_code = 0
+    if baseline is not None:
+        regressions = find_regressions(timings, baseline["timings"], args.threshold)
+        for stage, ratio in regressions.items():
+            print(f"Regression in `{stage}`: {ratio:.2f}x slower than {baseline['revision']}.", file=sys.stderr)
+        if regressions:
+            exit_code = 1
+
+    if not args.no_record:
+        results.append(
+            {
+                "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+                "revision": git_revision(),
+                "python": platform.python_version(),
+                "config": config,
+                "timings": timings,
+            }
+        )
+        write_results(args.results, results)
+
+    return exit_code
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--pipeline", choices=list(PIPELINES), default="rows")
+    parser.add_argument("--validate", action="store_true")
+    parser.add_argument("--access", choices=qea.ACCESS_MODES, default="readonly")
+    parser.add_argument(
+        "--compare-access",
+        action="store_true",
+        help="Compare cold and warm read times of all access modes, instead of running a pipeline.",
+    )
+    parser.add_argument(
+        "--compare-query",
+        action="store_true",
+        help="Compare the class query with its former subquery version, instead of running a pipeline.",
+    )
+    parser.add_argument("--classes", type=int, default=1000)
+    parser.add_argument("--attributes-per-class", type=int, default=5)
+    parser.add_argument("--connectors", type=int, default=1000)
+    parser.add_argument("--packages", type=int, default=50)
+    parser.add_argument("--package-depth", type=int, default=4)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--results", default=DEFAULT_RESULTS_FILE)
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD)
+    parser.add_argument("--no-record", action="store_true")
+    args = parser.parse_args()
+
+    sys.exit(run(args))
@@ -0,0 +1,152 @@
+from collections import OrderedDict
+from collections.abc import Iterable
+from typing import TYPE_CHECKING, Literal, TypeAlias
+
+from sparxea2linkml import main, qea
+
+if TYPE_CHECKING:
+    from linkml_runtime import linkml_model
+
+Collection = Literal["classes", "enums"]
+Definition: TypeAlias = "dict | linkml_model.ClassDefinition | linkml_model.EnumDefinition"
+
+DEFAULT_CACHE_SIZE = 1024  # Definitions
+
+
+class SchemaBuilder:
+    # Builds single class and enum definitions on demand, the same as they are
+    # in a monolithic schema, and keeps the most recently used ones. Only the
+    # rows of the requested classes are read, by index. Definitions are built
+    # as plain dicts, or with `validate` as `linkml_model` objects, and are
+    # shared by all callers, so they should not be modified.
+    # A builder reads the model as it was when it was opened, and its SQLite
+    # connection can only be used by the thread that opened it.
+    def __init__(
+        self,
+        cim_db: main.QEAProjectFile,
+        validate=False,
+        cache_size: int = DEFAULT_CACHE_SIZE,
+        access: qea.AccessMode = "readonly",
+    ):
+        self.validate = validate
+        self.cache_size = cache_size
+        self.conn = qea.connect(cim_db, access)
+
+        # Like the schema, the last of the classes (or enums) sharing a name wins.
+        self.object_ids: dict[Collection, dict[str, int]] = {"classes": {}, "enums": {}}
+        for object_id, name, stereotype in self.conn.execute(
+            'SELECT Object_ID, Name, Stereotype FROM t_object WHERE Object_Type = "Class" ORDER BY Object_ID'
+        ):
+            match stereotype:
+                case "Primitive":
+                    continue
+                case "enumeration":
+                    self.object_ids["enums"][name] = object_id
+                case _:
+                    self.object_ids["classes"][name] = object_id
+
+        self._definitions: OrderedDict[tuple[Collection, str], Definition] = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def close(self) -> None:
+        self.conn.close()
+
+    def __enter__(self) -> "SchemaBuilder":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def get_class(self, name: str) -> Definition:
+        return self.get_definitions("classes", [name])[name]
+
+    def get_enum(self, name: str) -> Definition:
+        return self.get_definitions("enums", [name])[name]
+
+    def get_definitions(self, collection: Collection, names: Iterable[str]) -> dict[str, Definition]:
+        # The definitions of `names`, of which those that are not cached are
+        # read and built together.
+        names = list(dict.fromkeys(names))
+        for name in names:
+            if name not in self.object_ids[collection]:
+                kind = "Class" if collection == "classes" else "Enum"
+                raise ValueError(f"{kind} `{name}` does not exist.")
+
+        definitions = {}
+        for name in names:
+            key = (collection, name)
+            if key in self._definitions:
+                self._definitions.move_to_end(key)
+                definitions[name] = self._definitions[key]
+                self.hits += 1
+
+        missing = [name for name in names if name not in definitions]
+        if missing:
+            self.misses += len(missing)
+            uml_class_rows = list(
+                main.read_uml_classes(
+                    self.conn,
+                    class_ids=[self.object_ids[collection][name] for name in missing],
+                    reuse_lookups=True,
+                )
+            )
+            if self.validate:
+                built = getattr(main.build_schema(uml_class_rows), collection)
+            else:
+                built = main.build_schema_dict(uml_class_rows)[collection]
+
+            for name in missing:
+                definitions[name] = self._definitions[(collection, name)] = built[name]
+            while len(self._definitions) > self.cache_size:
+                self._definitions.popitem(last=False)
+
+        return {name: definitions[name] for name in names}
+
+    def get_schema(
+        self, class_names: Iterable[str] = (), enum_names: Iterable[str] = ()
+    ) -> "dict | linkml_model.SchemaDefinition":
+        # A monolithic schema of only these classes and enums, their ancestors,
+        # and the enums that they (or their ancestors) use as ranges. Other
+        # classes used as ranges are only referred to by name.
+        classes = {}
+        pending = list(class_names)
+        while pending:
+            classes.update(self.get_definitions("classes", pending))
+            pending = [
+                is_a
+                for definition in classes.values()
+                if (is_a := self._field(definition, "is_a")) is not None
+                and is_a not in classes
+                and is_a in self.object_ids["classes"]
+            ]
+
+        enum_names = list(enum_names)
+        for definition in classes.values():
+            for attribute in self._field(definition, "attributes").values():
+                if self._field(attribute, "range") in self.object_ids["enums"]:
+                    enum_names.append(self._field(attribute, "range"))
+        enums = self.get_definitions("enums", enum_names)
+
+        schema = main.build_schema([]) if self.validate else main.build_schema_dict([])
+        for collection, collection_definitions in (("classes", classes), ("enums", enums)):
+            for name, definition in sorted(collection_definitions.items(), key=self._order(collection)):
+                self._field(schema, collection)[name] = definition
+
+        return schema
+
+    def cache_info(self) -> dict[str, int]:
+        # Shaped like the stats of `naming.cache_stats`.
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "maxsize": self.cache_size,
+            "currsize": len(self._definitions),
+        }
+
+    def _field(self, definition: Definition, name: str):
+        return getattr(definition, name) if self.validate else definition[name]
+
+    def _order(self, collection: Collection):
+        # Definitions come in the order of the whole schema: that of their IDs.
+        return lambda item: self.object_ids[collection][item[0]]
@@ -0,0 +1,96 @@
+import hashlib
+import importlib.metadata
+import os
+import pickle
+import tempfile
+
+CacheDir = os.PathLike | str
+CacheKey = str
+
+CACHE_FORMAT_VERSION = 3
+CACHE_SUFFIX = ".pickle"
+DEFAULT_MAX_CACHE_SIZE = 1024**3  # Bytes
+
+
+def tool_version() -> str:
+    try:
+        return importlib.metadata.version("sparxea2linkml")
+    except importlib.metadata.PackageNotFoundError:
+        return "unknown"
+
+
+def hash_file(path: os.PathLike | str) -> str:
+    with open(path, "rb") as f:
+        return hashlib.file_digest(f, "sha256").hexdigest()
+
+
+def model_cache_key(qea_file: os.PathLike | str, kind: str) -> CacheKey:
+    return f"{kind}-{hash_file(qea_file)}-{tool_version()}-{CACHE_FORMAT_VERSION}"
+
+
+def load_model(cache_dir: CacheDir, key: CacheKey) -> object | None:
+    path = os.path.join(cache_dir, key + CACHE_SUFFIX)
+
+    try:
+        with open(path, "rb") as f:
+            model = pickle.load(f)
+    except FileNotFoundError:
+        return None
+    except (pickle.UnpicklingError, EOFError, AttributeError, ImportError):
+        # Truncated or written by an incompatible version; rebuild it.
+        remove_entry(path)
+        return None
+
+    # Eviction is least recently used first, so mark this entry as used. Runs
+    # sharing the cache directory may have evicted it since it was read.
+    try:
+        os.utime(path)
+    except FileNotFoundError:
+        pass
+
+    return model
+
+
+def store_model(
+    cache_dir: CacheDir, key: CacheKey, model: object, max_size: int = DEFAULT_MAX_CACHE_SIZE
+) -> None:
+    os.makedirs(cache_dir, exist_ok=True)
+
+    # Write to a temporary file first so concurrent runs never read a partial entry.
+    fd, tmp_path = tempfile.mkstemp(dir=cache_dir, suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            pickle.dump(model, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, os.path.join(cache_dir, key + CACHE_SUFFIX))
+    except BaseException:
+        remove_entry(tmp_path)
+        raise
+
+    evict(cache_dir, max_size)
+
+
+def remove_entry(path: os.PathLike | str) -> None:
+    # Another run sharing the cache directory may have removed it already.
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
+
+
+def evict(cache_dir: CacheDir, max_size: int = DEFAULT_MAX_CACHE_SIZE) -> None:
+    entries = []
+    for entry in os.scandir(cache_dir):
+        if entry.is_file() and entry.name.endswith(CACHE_SUFFIX):
+            try:
+                stat = entry.stat()
+            except FileNotFoundError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, entry.path))
+
+    total_size = sum(size for _, size, _ in entries)
+    for _, size, path in sorted(entries):
+        if total_size <= max_size:
+            break
+
+        remove_entry(path)
+        total_size -= size
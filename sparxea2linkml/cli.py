@@ -0,0 +1,201 @@
+import argparse
+import os
+import sys
+import time
+from collections.abc import Sequence
+
+from sparxea2linkml import main as pipeline
+from sparxea2linkml import profiling, qea, watch
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        prog="sparxea2linkml", description="Convert Sparx EA (.qea) models to LinkML schemas."
+    )
+    parser.add_argument(
+        "cim_dbs",
+        metavar="QEA_FILE",
+        nargs="+",
+        help="Sparx EA project files to convert. Several are each written to a directory named after them.",
+    )
+    parser.add_argument(
+        "--output",
+        "-o",
+        help="Output directory (default: out), or with --monolithic the YAML file (default: cim.yml).",
+    )
+    parser.add_argument(
+        "--package",
+        dest="package_path",
+        metavar="PATH",
+        help="Only generate this package subtree, like TC57CIM/IEC61970/Base/Wires.",
+    )
+    mode = parser.add_mutually_exclusive_group()
+    mode.add_argument(
+        "--per-package",
+        dest="schema_per_package",
+        action="store_true",
+        default=True,
+        help="Write one schema per EA package (default).",
+    )
+    mode.add_argument(
+        "--monolithic",
+        dest="schema_per_package",
+        action="store_false",
+        help="Write the whole model as a single schema.",
+    )
+    parser.add_argument(
+        "--jobs", "-j", type=int, default=1, help="Worker processes for per-package schemas."
+    )
+    parser.add_argument(
+        "--stream",
+        action="store_true",
+        help="Write package schemas while reading, holding one package in memory at a time.",
+    )
+    parser.add_argument(
+        "--watch",
+        action="store_true",
+        help="Keep running, and regenerate the changed package schemas whenever the QEA file is saved.",
+    )
+    parser.add_argument(
+        "--no-incremental",
+        dest="incremental",
+        action="store_false",
+        help="Rewrite all package schemas, including those that did not change.",
+    )
+    parser.add_argument(
+        "--access",
+        choices=qea.ACCESS_MODES,
+        default="readonly",
+        help="Open the QEA file read-only (default), as immutable (no locking), or copied into memory.",
+    )
+    parser.add_argument(
+        "--compile",
+        dest="with_compiled",
+        action="store_true",
+        help="With --monolithic, also write the schema as a pickle (like cim.pickle) that loads much faster.",
+    )
+    parser.add_argument("--cache-dir", help="Cache the parsed model in this directory.")
+    parser.add_argument(
+        "--validate", action="store_true", help="Build schemas with the LinkML metamodel classes."
+    )
+    parser.add_argument("--profile", action="store_true", help="Print stage timings to stderr.")
+    parser.add_argument("--profile-report", help="Write stage and package timings to this JSON file.")
+    parser.add_argument("--trace-memory", action="store_true", help="Also profile Python allocations.")
+
+    return parser
+
+
+def print_summary(summary: pipeline.OutputSummary, prefix: str = "") -> None:
+    print(
+        f"{prefix}{summary.written} written, {summary.unchanged} unchanged, {summary.deleted} deleted.",
+        file=sys.stderr,
+    )
+
+
+def run_watch(args: argparse.Namespace) -> int:
+    watcher = watch.ModelWatcher(
+        args.cim_dbs[0],
+        output=args.output,
+        jobs=args.jobs,
+        validate=args.validate,
+        package_path=args.package_path,
+        access=args.access,
+    )
+    try:
+        for summary, profiler in watch.watch(watcher):
+            print_summary(summary, f"[{time.strftime('%H:%M:%S')}] ")
+            if args.profile:
+                profiler.print_summary()
+            if args.profile_report:
+                profiler.write_report(args.profile_report)
+    except KeyboardInterrupt:
+        pass
+
+    return 0
+
+
+def main(argv: Sequence[str] | None = None) -> int:
+    parser = build_parser()
+    args = parser.parse_args(argv)
+
+    for cim_db in args.cim_dbs:
+        if not os.path.isfile(cim_db):
+            parser.error(f"QEA file `{cim_db}` does not exist.")
+    if args.jobs < 1:
+        parser.error("--jobs must be at least 1.")
+    if args.stream and not args.schema_per_package:
+        parser.error("--stream cannot be combined with --monolithic.")
+    if args.stream and args.cache_dir:
+        parser.error("--stream cannot be combined with --cache-dir.")
+    if args.with_compiled and args.schema_per_package:
+        parser.error("--compile requires --monolithic.")
+    if len(args.cim_dbs) > 1 and not args.schema_per_package:
+        parser.error("Several QEA files cannot be combined with --monolithic.")
+    if len(args.cim_dbs) > 1 and args.stream:
+        parser.error("Several QEA files cannot be combined with --stream.")
+    model_names = [os.path.splitext(os.path.basename(cim_db))[0] for cim_db in args.cim_dbs]
+    if len(set(model_names)) < len(model_names):
+        parser.error("QEA files to convert together must have different names.")
+    if args.watch:
+        if len(args.cim_dbs) > 1:
+            parser.error("Only one QEA file can be watched.")
+        for option, conflicts in (
+            ("--monolithic", not args.schema_per_package),
+            ("--stream", args.stream),
+            ("--cache-dir", args.cache_dir),
+            ("--no-incremental", not args.incremental),
+            ("--access immutable", args.access == "immutable"),
+        ):
+            if conflicts:
+                parser.error(f"--watch cannot be combined with {option}.")
+
+        try:
+            return run_watch(args)
+        except pipeline.PackageNotFoundError as e:
+            parser.error(str(e))
+
+    profiler = profiling.Profiler(trace_memory=args.trace_memory)
+    if len(args.cim_dbs) > 1:
+        try:
+            summaries = pipeline.generate_schemas(
+                cim_dbs=args.cim_dbs,
+                jobs=args.jobs,
+                incremental=args.incremental,
+                cache_dir=args.cache_dir,
+                validate=args.validate,
+                profiler=profiler,
+                output=args.output,
+                package_path=args.package_path,
+                access=args.access,
+            )
+        except pipeline.PackageNotFoundError as e:
+            parser.error(str(e))
+    else:
+        try:
+            summaries = {
+                args.cim_dbs[0]: pipeline.generate_schema(
+                    cim_db=args.cim_dbs[0],
+                    schema_per_package=args.schema_per_package,
+                    jobs=args.jobs,
+                    incremental=args.incremental,
+                    cache_dir=args.cache_dir,
+                    validate=args.validate,
+                    profiler=profiler,
+                    output=args.output,
+                    package_path=args.package_path,
+                    stream=args.stream,
+                    access=args.access,
+                    with_compiled=args.with_compiled,
+                )
+            }
+        except pipeline.PackageNotFoundError as e:
+            parser.error(str(e))
+
+    for cim_db, summary in summaries.items():
+        print_summary(summary, f"{cim_db}: " if len(summaries) > 1 else "")
+    if args.profile:
+        profiler.print_summary()
+    if args.profile_report:
+        profiler.write_report(args.profile_report)
+
+    return 0
@@ -0,0 +1,63 @@
+import os
+import pickle
+
+from sparxea2linkml import cache
+
+# A schema as the dict tree that loading its YAML gives, pickled next to the
+# YAML file with a hash of it. Unpickling it is much faster than parsing YAML,
+# but like any pickle, it should only be loaded from a trusted source.
+COMPILED_FORMAT_VERSION = 1
+COMPILED_SUFFIX = ".pickle"
+
+CompiledFilePath = os.PathLike | str
+
+
+def compiled_path(yaml_path: os.PathLike | str) -> CompiledFilePath:
+    # Like "cim.pickle" for "cim.yml".
+    return os.path.splitext(yaml_path)[0] + COMPILED_SUFFIX
+
+
+def dumps(schema: dict, yaml_path: os.PathLike | str) -> bytes:
+    # `yaml_path` is the file `schema` was written to.
+    return pickle.dumps(
+        {"version": COMPILED_FORMAT_VERSION, "yaml_sha256": cache.hash_file(yaml_path), "schema": schema},
+        protocol=pickle.HIGHEST_PROTOCOL,
+    )
+
+
+def read(path: CompiledFilePath) -> tuple[str, dict] | None:
+    # The YAML hash and schema of a compiled file, or None if there is none
+    # that this version can read.
+    try:
+        with open(path, "rb") as f:
+            compiled = pickle.load(f)
+    except (FileNotFoundError, pickle.UnpicklingError, EOFError, AttributeError, ImportError):
+        return None
+
+    if not isinstance(compiled, dict) or compiled.get("version") != COMPILED_FORMAT_VERSION:
+        return None
+
+    return compiled["yaml_sha256"], compiled["schema"]
+
+
+def is_stale(yaml_path: os.PathLike | str) -> bool:
+    # Whether the compiled file of `yaml_path` is missing, unreadable, or
+    # compiled from other contents than the YAML file has now.
+    compiled = read(compiled_path(yaml_path))
+    return compiled is None or compiled[0] != cache.hash_file(yaml_path)
+
+
+def load_schema(yaml_path: os.PathLike | str, check_stale=True) -> dict:
+    # The schema of `yaml_path` as a dict, read from its compiled file unless
+    # that is stale (see `is_stale`), in which case the YAML is parsed. Without
+    # `check_stale`, a readable compiled file is used without hashing the YAML.
+    compiled = read(compiled_path(yaml_path))
+    if compiled is not None:
+        yaml_hash, schema = compiled
+        if not check_stale or yaml_hash == cache.hash_file(yaml_path):
+            return schema
+
+    import yaml
+
+    with open(yaml_path) as f:
+        return yaml.load(f, Loader=getattr(yaml, "CSafeLoader", yaml.SafeLoader))
@@ -1,10 +1,14 @@
 import math
 import os
 import sys
-from dataclasses import dataclass
+from collections.abc import Iterable
+from dataclasses import dataclass, field
 from enum import Enum, auto
 from typing import NewType
 
+QEAProjectFile = os.PathLike | str
+MANY = sys.maxsize
+
 AttributeID = int
 ObjectID = int
 UMLClassName = str
@@ -47,9 +51,13 @@ class UMLRelationType(Enum):
     USECASE = auto()
 
 
-@dataclass
+# The model is kept in memory as a whole, so its classes are slotted, and
+# names and stereotypes are interned: the same few strings recur throughout.
+
+
+@dataclass(frozen=True, slots=True)
 class UMLAttribute:
-    id: ObjectID
+    id: AttributeID
     name: UMLAttributeName
     lower_bound: int
     upper_bound: int
@@ -58,7 +66,7 @@ class UMLAttribute:
     stereotype: str | None
 
 
-@dataclass
+@dataclass(frozen=True, slots=True)
 class UMLRelation:
     connector_type: UMLRelationType
     start_object_id: ObjectID
@@ -71,32 +79,34 @@ class UMLRelation:
     dest_role_note: str | None
 
 
-@dataclass
+@dataclass(frozen=True, slots=True)
 class UMLClass:
     id: ObjectID
     name: UMLClassName
     package_id: int
-    attributes: dict[UMLAttributeName, UMLAttribute]
+    attributes: tuple[UMLAttribute, ...]
     note: str | None
     stereotype: str | None
 
 
 @dataclass
-class UMLClass2:
-    id: ObjectID
-    name: UMLClassName
-    package_id: int
-    stereotype: str | None
-    note: str | None
-    attributes: dict[UMLAttributeName, UMLAttribute]
+class UMLModel:
+    classes_by_id: dict[ObjectID, UMLClass] = field(default_factory=dict)
+    # Of classes sharing a name, the first one (by object ID) is kept.
+    classes_by_name: dict[UMLClassName, UMLClass] = field(default_factory=dict)
 
+    @classmethod
+    def from_classes(cls, uml_classes: Iterable[tuple[ObjectID, UMLClass]]) -> "UMLModel":
+        model = cls()
+        for _, uml_class in uml_classes:
+            model.add_class(uml_class)
 
-@dataclass
-class UMLAttribute2:
-    id: AttributeID
-    name: UMLAttributeName
-    lower_bound: int
-    upper_bound: int
-    type: str
-    note: str | None
-    stereotype: str | None
+        return model
+
+    def add_class(self, uml_class: UMLClass) -> None:
+        self.classes_by_id[uml_class.id] = uml_class
+        self.classes_by_name.setdefault(uml_class.name, uml_class)
+
+
+def intern(val: str | None) -> str | None:
+    return None if val is None else sys.intern(val)
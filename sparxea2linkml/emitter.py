@@ -0,0 +1,139 @@
+import dataclasses
+from collections.abc import Iterable
+from typing import Any, TextIO
+
+import yaml
+from linkml_runtime import linkml_model
+from linkml_runtime.dumpers import json_dumper
+from linkml_runtime.utils.formatutils import is_empty
+from linkml_runtime.utils.schema_as_dict import _remove_names, schema_as_dict
+
+# Schema collections that are converted and written one definition at a time.
+STREAMED_COLLECTIONS = ("enums", "classes")
+
+
+class StreamingDumper(yaml.SafeDumper):
+    def dump_data(self, data: Any) -> None:
+        node = self.represent_data(data)
+        self.anchor_node(node)
+        self.serialize_node(node, None, None)
+
+        # Nothing is shared between definitions, so drop the bookkeeping
+        # `represent()` and `serialize()` would otherwise reset per document.
+        self.represented_objects = {}
+        self.object_keeper = []
+        self.alias_key = None
+        self.serialized_nodes = {}
+        self.anchors = {}
+
+    def start_mapping(self) -> None:
+        self.emit(
+            yaml.MappingStartEvent(
+                anchor=None, tag=yaml.resolver.BaseResolver.DEFAULT_MAPPING_TAG, implicit=True, flow_style=False
+            )
+        )
+
+    def end_mapping(self) -> None:
+        self.emit(yaml.MappingEndEvent())
+
+
+def drop_empty(obj: Any) -> Any:
+    # Same notion of "empty" as `json_dumper`, which drops these entries.
+    if isinstance(obj, dict):
+        obj = {k: drop_empty(v) for k, v in obj.items()}
+        return {k: v for k, v in obj.items() if not is_empty(v)}
+
+    return obj
+
+
+def normalize_definition(collection: str, name: str, obj: dict) -> dict:
+    # Mirrors `schema_as_dict` for a single definition of `collection`.
+    if collection == "enums":
+        for pv in obj.get("permissible_values", {}).values():
+            del pv["text"]
+
+    return _remove_names({collection: {name: obj}}, None)[collection][name]
+
+
+def write_document(
+    stream: TextIO,
+    header: dict,
+    definitions: dict[str, Iterable[tuple[str, dict]]],
+    document: dict | None = None,
+) -> None:
+    # With `document`, the entries written are also collected in it, as the
+    # dict that loading the YAML gives.
+    dumper = StreamingDumper(stream, default_flow_style=False, sort_keys=False)
+    try:
+        dumper.open()
+        dumper.emit(yaml.DocumentStartEvent(explicit=False))
+        dumper.start_mapping()
+
+        # Top-level keys come in the order `json_dumper` uses: that of the fields.
+        for field in dataclasses.fields(linkml_model.SchemaDefinition):
+            if field.name in header:
+                value = header.pop(field.name)
+                dumper.dump_data(field.name)
+                dumper.dump_data(value)
+                if document is not None:
+                    document[field.name] = value
+            elif field.name in definitions:
+                if document is not None:
+                    document[field.name] = {}
+                dumper.dump_data(field.name)
+                dumper.start_mapping()
+                for name, obj in definitions[field.name]:
+                    obj = normalize_definition(field.name, name, obj)
+                    dumper.dump_data(name)
+                    dumper.dump_data(obj)
+                    if document is not None:
+                        document[field.name][name] = obj
+                dumper.end_mapping()
+
+        for key, value in header.items():
+            dumper.dump_data(key)
+            dumper.dump_data(value)
+            if document is not None:
+                document[key] = value
+
+        dumper.end_mapping()
+        dumper.emit(yaml.DocumentEndEvent(explicit=False))
+        dumper.close()
+    finally:
+        dumper.dispose()
+
+
+def dump_schema(
+    schema: linkml_model.SchemaDefinition, stream: TextIO, document: dict | None = None
+) -> None:
+    # Produces the same bytes as `schema_as_yaml_dump(schema)`, but never holds
+    # more than one class or enum definition in converted form.
+    header = schema_as_dict(
+        dataclasses.replace(schema, **{collection: {} for collection in STREAMED_COLLECTIONS})
+    )
+    definitions = {
+        collection: (
+            (name, json_dumper.to_dict(definition))
+            for name, definition in getattr(schema, collection).items()
+        )
+        for collection in STREAMED_COLLECTIONS
+        if getattr(schema, collection)
+    }
+
+    write_document(stream, header, definitions, document)
+
+
+def dump_schema_dict(schema: dict, stream: TextIO, document: dict | None = None) -> None:
+    # Writes a schema built as plain dicts, shaped like `json_dumper.to_dict`
+    # output except that entries may still be empty, the same way `dump_schema`
+    # writes a `SchemaDefinition`.
+    header = _remove_names(
+        drop_empty({k: v for k, v in schema.items() if k not in STREAMED_COLLECTIONS}), None
+    )
+    definitions = {
+        collection: ((name, drop_empty(definition)) for name, definition in schema[collection].items())
+        for collection in STREAMED_COLLECTIONS
+        if schema.get(collection)
+    }
+
+    write_document(stream, header, definitions, document)
@@ -0,0 +1,129 @@
+import sqlite3
+from collections import defaultdict
+from collections.abc import Iterable, Iterator
+from dataclasses import dataclass
+from itertools import groupby
+from operator import itemgetter
+
+from sparxea2linkml import naming
+
+# A sidecar index of every class's ancestors and induced slots, so consumers
+# of the schemas need not resolve `is_a` chains (as `SchemaView` does) first.
+INDEX_VERSION = 1
+
+ClassIndex = dict
+
+
+@dataclass(slots=True)
+class ClassRecord:
+    id: int
+    name: str
+    package_id: int
+    is_a: str | None
+    slots: list[str]  # Names of its own attributes
+
+
+def class_records(uml_class_rows: Iterable[sqlite3.Row | dict]) -> Iterator[ClassRecord]:
+    # The classes of `main.read_uml_classes` rows, with the `is_a` and slot
+    # names `main.build_schema` gives them. Enumerations and primitives are
+    # not classes in the schemas.
+    for class_id, class_rows in groupby(uml_class_rows, itemgetter("ClassID")):
+        class_rows = list(class_rows)
+        if class_rows[0]["ClassStereotype"] in ("Primitive", "enumeration"):
+            continue
+
+        is_a = None
+        slots = {}
+        for attr in class_rows:
+            if attr["AttrID"] is None and attr["RelID"] is None:
+                continue
+
+            if attr["AttrRelationType"] == "Generalization":
+                if is_a is None:
+                    is_a = attr["AttrRange"]
+                continue
+
+            if attr["AttrName"] is not None:
+                slots[naming.slot_name(attr["AttrName"])] = None
+
+        yield ClassRecord(class_id, class_rows[0]["ClassName"], class_rows[0]["ClassPackageID"], is_a, list(slots))
+
+
+def build_index(records: Iterable[ClassRecord], package_paths: dict[int, str]) -> ClassIndex:
+    # Ancestors (nearest first) and induced slots of every class, the latter
+    # mapped to the class that defines them, ordered like `SchemaView` orders
+    # them: own slots first, then those of each ancestor in turn. Classes are
+    # resolved parents first, each extending its parent's results, so this
+    # takes time linear in the size of the index. Of classes sharing a name,
+    # the first one (by object ID) is kept, and of the is_a parents outside
+    # the model, only the name is known.
+    records_by_name: dict[str, ClassRecord] = {}
+    for record in sorted(records, key=lambda record: record.id):
+        records_by_name.setdefault(record.name, record)
+
+    children = defaultdict(list)
+    stack = []
+    for record in records_by_name.values():
+        if record.is_a in records_by_name and record.is_a != record.name:
+            children[record.is_a].append(record.name)
+        else:
+            stack.append(record.name)
+
+    ancestors: dict[str, list[str]] = {}
+    induced: dict[str, dict[str, str]] = {}
+
+    def resolve(name: str, parent: str | None) -> None:
+        record = records_by_name[name]
+        ancestors[name] = [] if parent is None else [parent, *ancestors.get(parent, ())]
+        induced[name] = {slot: name for slot in record.slots}
+        for slot, owner in induced.get(parent, {}).items():
+            induced[name].setdefault(slot, owner)
+
+    while stack:
+        name = stack.pop()
+        is_a = records_by_name[name].is_a
+        resolve(name, None if is_a == name else is_a)
+        stack.extend(children.get(name, ()))
+
+    # Classes left are in (or below) an `is_a` cycle. Their chain is followed
+    # up to a resolved class, or cut where it would first repeat.
+    for name in sorted(records_by_name.keys() - ancestors.keys()):
+        if name in ancestors:
+            continue
+
+        chain = [name]
+        while (parent := records_by_name[chain[-1]].is_a) in records_by_name and not (
+            parent in ancestors or parent in chain
+        ):
+            chain.append(parent)
+
+        resolve(chain[-1], None if parent in chain else parent)
+        for child, parent in zip(reversed(chain[:-1]), reversed(chain[1:])):
+            resolve(child, parent)
+
+    return {
+        "version": INDEX_VERSION,
+        "classes": {
+            name: {
+                "id": record.id,
+                "package_id": record.package_id,
+                "package": package_paths.get(record.package_id, ""),
+                "ancestors": ancestors[name],
+                "induced_slots": induced[name],
+            }
+            for name, record in sorted(records_by_name.items())
+        },
+    }
+
+
+def index_records(index: ClassIndex) -> Iterator[ClassRecord]:
+    # The records an index was built from, but for classes that lost to
+    # another of the same name.
+    for name, entry in index["classes"].items():
+        yield ClassRecord(
+            entry["id"],
+            name,
+            entry["package_id"],
+            entry["ancestors"][0] if entry["ancestors"] else None,
+            [slot for slot, owner in entry["induced_slots"].items() if owner == name],
+        )
@@ -1,20 +1,43 @@
+import filecmp
+import hashlib
+import json
 import os
 import sys
 import sqlite3
+import tempfile
 import textwrap
-import urllib.parse
+import time
+from collections import defaultdict, deque
+from collections.abc import Callable, Iterable, Iterator
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from functools import partial
 from itertools import groupby
 from operator import itemgetter
 from pprint import pprint
-from typing import Literal
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, BinaryIO, Literal, TextIO
 
-from linkml_runtime.utils.schema_as_dict import schema_as_yaml_dump
-from linkml_runtime.utils.formatutils import uncamelcase, underscore
-from linkml_runtime import linkml_model
+from sparxea2linkml import cache, compiled, inheritance, naming, profiling, qea
+
+if TYPE_CHECKING:
+    from linkml_runtime import linkml_model
+
+# `linkml_runtime` takes about a second to import, so it is only imported by
+# the functions that build and write schemas.
 
 YAMLFilePath = os.PathLike | str
+OutputDirPath = os.PathLike | str
+ManifestFilePath = os.PathLike | str
+ClassIndexFilePath = os.PathLike | str
 QEAProjectFile = os.PathLike | str
 MANY = sys.maxsize
+MANIFEST_FILENAME = ".manifest.json"
+MANIFEST_VERSION = 2
+# Bumped whenever the same rows give different schema files, so that files
+# written before are rebuilt, like they are after a new release.
+OUTPUT_FORMAT_VERSION = 1
+INDEX_FILENAME = "index.json"
+FETCH_BATCH_SIZE = 1000
 CURIE = str
 
 UMLCardinalityValue = int
@@ -43,12 +66,282 @@ LinkMLTypes = Literal[
 ]
 
 
-def read_uml_classes(conn: sqlite3.Connection) -> sqlite3.Cursor:
+def indexed_columns(conn: sqlite3.Connection, table: str) -> set[str]:
     cur = conn.cursor()
     cur.row_factory = sqlite3.Row
 
-    query = textwrap.dedent(
+    # An `INTEGER PRIMARY KEY` aliases the rowid and needs no separate index.
+    columns = {
+        col["name"]
+        for col in cur.execute(f"PRAGMA table_info({table})").fetchall()
+        if col["pk"] == 1 and col["type"].upper() == "INTEGER"
+    }
+    for index in cur.execute(f"PRAGMA index_list({table})").fetchall():
+        index_info = cur.execute(f"PRAGMA index_info({index['name']})").fetchall()
+        if index_info:
+            columns.add(index_info[0]["name"])
+
+    return columns
+
+
+def temp_tables(conn: sqlite3.Connection) -> set[str]:
+    return {name for name, in conn.execute("SELECT name FROM sqlite_temp_master WHERE type = 'table'")}
+
+
+def create_object_lookups(conn: sqlite3.Connection, reuse=False) -> tuple[str, str]:
+    # SQLite cannot put a TEMP index on a table of the QEA, so missing indexes
+    # are made up for by indexed TEMP copies of the lookup columns. Name lookups
+    # keep the first row per name (in rowid order), which is what the scalar
+    # subqueries they replace used to return.
+    # With `reuse`, copies made earlier on `conn` are used again, which is only
+    # right as long as the model did not change since.
+    indexed = indexed_columns(conn, "t_object")
+    existing = temp_tables(conn) if reuse else set()
+
+    object_by_id = "t_object"
+    if "Object_ID" not in indexed:
+        object_by_id = "temp.ObjectByID"
+    if "Object_ID" not in indexed and "ObjectByID" not in existing:
+        conn.executescript(
+            textwrap.dedent(
+                """
+                DROP TABLE IF EXISTS temp.ObjectByID;
+                CREATE TEMP TABLE ObjectByID (Object_ID INTEGER PRIMARY KEY, Name TEXT, Stereotype TEXT);
+                INSERT OR IGNORE INTO temp.ObjectByID
+                SELECT Object_ID, Name, Stereotype FROM t_object ORDER BY rowid;
+                """
+            )
+        )
+
+    if "Name" in indexed:
+        object_by_name = "(SELECT Name, Stereotype, MIN(rowid) FROM t_object GROUP BY Name)"
+    else:
+        object_by_name = "temp.ObjectByName"
+    if "Name" not in indexed and "ObjectByName" not in existing:
+        conn.executescript(
+            textwrap.dedent(
+                """
+                DROP TABLE IF EXISTS temp.ObjectByName;
+                CREATE TEMP TABLE ObjectByName (Name TEXT PRIMARY KEY, Stereotype TEXT);
+                INSERT OR IGNORE INTO temp.ObjectByName
+                SELECT Name, Stereotype FROM t_object WHERE Name IS NOT NULL ORDER BY rowid;
+                """
+            )
+        )
+
+    return object_by_id, object_by_name
+
+
+def create_member_lookups(conn: sqlite3.Connection, reuse=False) -> tuple[str, str, str]:
+    # Tables to look up the attribute IDs of an object, and the connector IDs
+    # by start and by end object, as `create_object_lookups` makes them.
+    existing = temp_tables(conn) if reuse else set()
+
+    lookups = []
+    for table, id_column, object_column, lookup in (
+        ("t_attribute", "ID", "Object_ID", "AttributeByObject"),
+        ("t_connector", "Connector_ID", "Start_Object_ID", "ConnectorByStart"),
+        ("t_connector", "Connector_ID", "End_Object_ID", "ConnectorByEnd"),
+    ):
+        if object_column in indexed_columns(conn, table):
+            lookups.append(table)
+            continue
+
+        lookups.append(f"temp.{lookup}")
+        if lookup not in existing:
+            conn.executescript(
+                textwrap.dedent(
+                    f"""
+                    DROP TABLE IF EXISTS temp.{lookup};
+                    CREATE TEMP TABLE {lookup} (
+                        {object_column} INTEGER NOT NULL,
+                        {id_column} INTEGER NOT NULL,
+                        PRIMARY KEY ({object_column}, {id_column})
+                    ) WITHOUT ROWID;
+                    INSERT OR IGNORE INTO temp.{lookup}
+                    SELECT {object_column}, {id_column} FROM {table}
+                    WHERE {object_column} IS NOT NULL AND {id_column} IS NOT NULL;
+                    """
+                )
+            )
+
+    return tuple(lookups)
+
+
+def create_name_lookup(conn: sqlite3.Connection, reuse=False) -> str:
+    # A table to look up the IDs of all objects by name, made like those of
+    # `create_member_lookups`.
+    if "Name" in indexed_columns(conn, "t_object"):
+        return "t_object"
+
+    if "ObjectIDByName" not in (temp_tables(conn) if reuse else set()):
+        conn.executescript(
+            textwrap.dedent(
+                """
+                DROP TABLE IF EXISTS temp.ObjectIDByName;
+                CREATE TEMP TABLE ObjectIDByName (
+                    Name TEXT NOT NULL,
+                    Object_ID INTEGER NOT NULL,
+                    PRIMARY KEY (Name, Object_ID)
+                ) WITHOUT ROWID;
+                INSERT OR IGNORE INTO temp.ObjectIDByName
+                SELECT Name, Object_ID FROM t_object WHERE Name IS NOT NULL AND Object_ID IS NOT NULL;
+                """
+            )
+        )
+
+    return "temp.ObjectIDByName"
+
+
+def read_uml_classes(
+    conn: sqlite3.Connection,
+    package_id: int | None = None,
+    order_by_package=False,
+    package_ids: Iterable[int] | None = None,
+    class_ids: Iterable[int] | None = None,
+    reuse_lookups=False,
+    with_references=False,
+) -> sqlite3.Cursor:
+    # With `package_id`, only the classes in that package and the packages
+    # below it are read, with `package_ids` only those directly in these
+    # packages, and with `class_ids` only those classes. Ranges are still
+    # resolved against the whole model.
+    # With `with_references`, the classes the subtree refers to (as ranges,
+    # association ends or parents) are read too, and those these refer to in
+    # turn, so that a monolithic schema of them is complete.
+    # With `order_by_package`, the rows of each package come together, but are
+    # otherwise in the same order.
+    # With `reuse_lookups`, lookups made by an earlier call on `conn` are used
+    # again (see `create_object_lookups`).
+    object_by_id, object_by_name = create_object_lookups(conn, reuse_lookups)
+
+    cur = conn.cursor()
+    cur.row_factory = sqlite3.Row
+
+    # Connectors are scanned once, joining each end object once, and crossed
+    # with `RelationEnd` to give a row for either end. Generalizations only
+    # give one for their start. The range stereotype of the end row is (as it
+    # always was) looked up by `End_Object_ID`. Nothing is deduplicated, so
+    # the end row of a self-association identical to its start row is
+    # filtered out explicitly, and the remaining columns break ties in the
+    # same order the deduplication used to leave them in.
+    subtree = ""
+    in_subtree = attr_in_subtree = relation_from_in_subtree = relation_to_in_subtree = ""
+    relations = "t_connector"
+    if sum(selection is not None for selection in (package_id, package_ids, class_ids)) > 1:
+        raise ValueError("Classes can be read by package subtree, by packages or by IDs, only one of them.")
+    if with_references and (package_ids is not None or class_ids is not None):
+        raise ValueError("Only the classes of a package subtree can be read with their references.")
+
+    if class_ids is not None:
+        conn.executescript(
+            textwrap.dedent(
+                """
+                DROP TABLE IF EXISTS temp.SelectedClass;
+                CREATE TEMP TABLE SelectedClass (Object_ID INTEGER PRIMARY KEY);
+                """
+            )
+        )
+        conn.executemany(
+            "INSERT OR IGNORE INTO temp.SelectedClass VALUES (?)", ((class_id,) for class_id in class_ids)
+        )
+        # Only the attributes and connectors of these classes are read, by index.
+        attribute_by_object, connector_by_start, connector_by_end = create_member_lookups(conn, reuse_lookups)
+        subtree = f"""
+            WITH SubtreeObject(Object_ID) AS (
+                SELECT Object_ID FROM temp.SelectedClass
+            ),
+            SelectedConnector(Connector_ID) AS (
+                SELECT Connector_ID FROM {connector_by_start} WHERE Start_Object_ID IN SubtreeObject
+                UNION
+                SELECT Connector_ID FROM {connector_by_end} WHERE End_Object_ID IN SubtreeObject
+            )
+        """
+        in_subtree = "AND Class.Object_ID IN SubtreeObject"
+        attr_in_subtree = f"WHERE Attr.ID IN (SELECT ID FROM {attribute_by_object} WHERE Object_ID IN SubtreeObject)"
+        relations = "(SELECT * FROM t_connector WHERE Connector_ID IN SelectedConnector)"
+        relation_from_in_subtree = "AND Relation.Start_Object_ID IN SubtreeObject"
+        relation_to_in_subtree = "AND Relation.End_Object_ID IN SubtreeObject"
+    elif package_id is not None or package_ids is not None:
+        if package_ids is None:
+            # `UNION` rather than `UNION ALL`, so cyclic parent links terminate.
+            selected_packages = """
+                SELECT :package_id
+                UNION
+                SELECT Child.Package_ID
+                FROM t_package AS Child
+                JOIN Subtree
+                ON Child.Parent_ID = Subtree.Package_ID
+            """
+        else:
+            conn.executescript(
+                textwrap.dedent(
+                    """
+                    DROP TABLE IF EXISTS temp.SelectedPackage;
+                    CREATE TEMP TABLE SelectedPackage (Package_ID INTEGER PRIMARY KEY);
+                    """
+                )
+            )
+            conn.executemany(
+                "INSERT OR IGNORE INTO temp.SelectedPackage VALUES (?)",
+                ((selected_id,) for selected_id in package_ids),
+            )
+            selected_packages = "SELECT Package_ID FROM temp.SelectedPackage"
+
+        # The filter is repeated in every branch of `Attribute`, so SQLite
+        # does not build it for the whole model first.
+        subtree_objects = "SELECT Object_ID FROM t_object WHERE Package_ID IN Subtree"
+        in_subtree = "AND Class.Package_ID IN Subtree"
+        if with_references:
+            # Every step looks up the members of the objects found by the
+            # previous one, by index. Attribute types refer to all objects of
+            # that name, of which the schema keeps one.
+            attribute_by_object, connector_by_start, connector_by_end = create_member_lookups(
+                conn, reuse_lookups
+            )
+            object_id_by_name = create_name_lookup(conn, reuse_lookups)
+            subtree_objects += f"""
+                UNION
+                SELECT RangeClass.Object_ID
+                FROM SubtreeObject
+                JOIN {attribute_by_object} AS AttrByObject
+                ON AttrByObject.Object_ID = SubtreeObject.Object_ID
+                JOIN t_attribute AS Attr
+                ON Attr.ID = AttrByObject.ID
+                JOIN {object_id_by_name} AS RangeClass
+                ON RangeClass.Name = Attr.Type
+                UNION
+                SELECT Relation.End_Object_ID
+                FROM SubtreeObject
+                JOIN {connector_by_start} AS ConnectorByStart
+                ON ConnectorByStart.Start_Object_ID = SubtreeObject.Object_ID
+                JOIN t_connector AS Relation
+                ON Relation.Connector_ID = ConnectorByStart.Connector_ID
+                UNION
+                SELECT Relation.Start_Object_ID
+                FROM SubtreeObject
+                JOIN {connector_by_end} AS ConnectorByEnd
+                ON ConnectorByEnd.End_Object_ID = SubtreeObject.Object_ID
+                JOIN t_connector AS Relation
+                ON Relation.Connector_ID = ConnectorByEnd.Connector_ID
+                WHERE Relation.Connector_Type != "Generalization"
+            """
+            in_subtree = "AND Class.Object_ID IN SubtreeObject"
+        subtree = f"""
+            WITH RECURSIVE Subtree(Package_ID) AS (
+                {selected_packages}
+            ),
+            SubtreeObject(Object_ID) AS (
+                {subtree_objects}
+            )
         """
+        attr_in_subtree = "WHERE Attr.Object_ID IN SubtreeObject"
+        relation_from_in_subtree = "AND Relation.Start_Object_ID IN SubtreeObject"
+        relation_to_in_subtree = "AND Relation.End_Object_ID IN SubtreeObject"
+
+    query = textwrap.dedent(
+        f"""
+        {subtree}
         SELECT
             Class.Object_ID AS ClassID,
             Class.Name AS ClassName,
@@ -77,49 +370,72 @@ def read_uml_classes(conn: sqlite3.Connection) -> sqlite3.Cursor:
                 Attr.Notes AS Description,
                 NULL AS RelationType,
                 Attr.Stereotype AS Stereotype,
-                (SELECT C_.Stereotype FROM t_object AS C_ WHERE Attr.Type = C_.Name) AS RangeStereotype
+                RangeClass.Stereotype AS RangeStereotype
             FROM t_attribute AS Attr
+            LEFT JOIN {object_by_name} AS RangeClass
+            ON Attr.Type = RangeClass.Name
+            {attr_in_subtree}
 
-            UNION
+            UNION ALL
 
             SELECT
                 NULL AS AttrID,
-                RelationFrom.Connector_ID AS RelID,
-                RelationFrom.Start_Object_ID AS Object_ID,
-                COALESCE(RelationFrom.DestRole, (SELECT C_.Name FROM t_object AS C_ WHERE RelationFrom.End_Object_ID = C_.Object_ID)) AS Name,
-                RelationFrom.DestCard AS Cardinality,
-                (SELECT C_.Name FROM t_object AS C_ WHERE RelationFrom.End_Object_ID = C_.Object_ID) AS Range,
-                RelationFrom.Notes AS Description,
-                RelationFrom.Connector_Type AS RelationType,
-                RelationFrom.Stereotype AS Stereotype,
-                (SELECT C_.Stereotype FROM t_object AS C_ WHERE RelationFrom.End_Object_ID = C_.Object_ID) AS RangeStereotype
-            FROM t_connector AS RelationFrom
-
-            UNION
-            
-            SELECT
-                NULL AS AttrID,
-                RelationTo.Connector_ID AS RelID,
-                RelationTo.End_Object_ID AS Object_ID,
-                COALESCE(RelationTo.SourceRole, (SELECT C_.Name FROM t_object AS C_ WHERE RelationTo.Start_Object_ID = C_.Object_ID)) AS Name,
-                RelationTo.SourceCard AS Cardinality,
-                (SELECT C_.Name FROM t_object AS C_ WHERE RelationTo.Start_Object_ID = C_.Object_ID) AS Range,
-                RelationTo.Notes AS Description,
-                RelationTo.Connector_Type AS RelationType,
-                RelationTo.Stereotype AS Stereotype,
-                (SELECT C_.Stereotype FROM t_object AS C_ WHERE RelationTo.End_Object_ID = C_.Object_ID) AS RangeStereotype
-            FROM t_connector AS RelationTo
-            WHERE RelationTo.Connector_Type != "Generalization"
+                Relation.Connector_ID AS RelID,
+                CASE WHEN RelationEnd.IsStart
+                    THEN Relation.Start_Object_ID
+                    ELSE Relation.End_Object_ID
+                END AS Object_ID,
+                CASE WHEN RelationEnd.IsStart
+                    THEN COALESCE(Relation.DestRole, EndClass.Name)
+                    ELSE COALESCE(Relation.SourceRole, StartClass.Name)
+                END AS Name,
+                CASE WHEN RelationEnd.IsStart
+                    THEN Relation.DestCard
+                    ELSE Relation.SourceCard
+                END AS Cardinality,
+                CASE WHEN RelationEnd.IsStart
+                    THEN EndClass.Name
+                    ELSE StartClass.Name
+                END AS Range,
+                Relation.Notes AS Description,
+                Relation.Connector_Type AS RelationType,
+                Relation.Stereotype AS Stereotype,
+                EndClass.Stereotype AS RangeStereotype
+            FROM {relations} AS Relation
+            LEFT JOIN {object_by_id} AS StartClass
+            ON Relation.Start_Object_ID = StartClass.Object_ID
+            LEFT JOIN {object_by_id} AS EndClass
+            ON Relation.End_Object_ID = EndClass.Object_ID
+            CROSS JOIN (SELECT 1 AS IsStart UNION ALL SELECT 0) AS RelationEnd
+            WHERE (
+                RelationEnd.IsStart
+                {relation_from_in_subtree}
+            ) OR (
+                NOT RelationEnd.IsStart
+                AND Relation.Connector_Type != "Generalization"
+                {relation_to_in_subtree}
+                AND NOT (
+                    Relation.Start_Object_ID IS Relation.End_Object_ID
+                    AND COALESCE(Relation.SourceRole, StartClass.Name)
+                        IS COALESCE(Relation.DestRole, EndClass.Name)
+                    AND Relation.SourceCard IS Relation.DestCard
+                )
+            )
 
         ) AS Attribute
 
         ON Class.Object_ID = Attribute.Object_ID
         WHERE Class.Object_Type = "Class"
+        {in_subtree}
         -- AND Class.Object_ID = 84
-        ORDER BY Class.Object_ID, AttrID, RelID
+        ORDER BY
+            {"Class.Package_ID," if order_by_package else ""}
+            Class.Object_ID, AttrID, RelID,
+            AttrName, AttrCardinality, AttrRange, AttrDescription,
+            AttrRelationType, AttrStereotype, AttrRangeStereotype
         """
     )
-    uml_class_rows = cur.execute(query)
+    uml_class_rows = cur.execute(query, {"package_id": package_id})
 
     return uml_class_rows
 
@@ -143,20 +459,40 @@ def read_packages(conn: sqlite3.Connection) -> sqlite3.Cursor:
     return packages
 
 
-def parse_cardinality_value(val: tuple[str, str] | None) -> UMLCardinality:
-    if val is None:
-        return (0, 1)
+def read_class_packages(conn: sqlite3.Connection) -> dict[str, int]:
+    # The package of every class, by name. Of classes sharing a name, the first
+    # one (in rowid order) is kept, like ranges are looked up by name.
+    query = textwrap.dedent(
+        """
+        SELECT Name, Package_ID
+        FROM t_object
+        WHERE Object_Type = "Class" AND Name IS NOT NULL
+        ORDER BY rowid
+        """
+    )
+    class_packages = {}
+    for name, package_id in conn.execute(query):
+        class_packages.setdefault(name, package_id)
+
+    return class_packages
+
 
-    lower, _, upper = val.partition("..")
+def schema_imports(
+    referenced_names: Iterable[str | None], class_imports: dict[str, str] | None
+) -> list[str]:
+    # The imports of the schemas defining the classes and enums in
+    # `referenced_names`, out of the candidates in `class_imports`.
+    if not class_imports:
+        return []
 
-    if upper == "":
-        upper = lower
+    return sorted({class_imports[name] for name in referenced_names if name in class_imports})
 
-    return tuple(map(lambda v: MANY if v in ["n", "*"] else int(v), (lower, upper)))
 
+def parse_cardinality_value(val: tuple[str, str] | None) -> UMLCardinality:
+    if val is None:
+        return (0, 1)
 
-def generate_curie(prefix: str, local_name: str) -> CURIE:
-    return f"{prefix}:{urllib.parse.quote(local_name)}"
+    return naming.parse_cardinality(val)
 
 
 def map_primitive_data_type(val: str) -> LinkMLTypes:
@@ -185,7 +521,15 @@ def map_primitive_data_type(val: str) -> LinkMLTypes:
             raise TypeError(f"Data type `{val}` is not a CIM Primitive.")
 
 
-def build_schema(uml_classes: sqlite3.Cursor, package=None, pkg_path_parts=None) -> linkml_model.SchemaDefinition:
+def build_schema(
+    uml_classes: sqlite3.Cursor,
+    package=None,
+    pkg_path_parts=None,
+    class_imports: dict[str, str] | None = None,
+) -> "linkml_model.SchemaDefinition":
+    # `class_imports` maps the names of classes defined by other schemas to
+    # their imports, and those that are referenced are imported.
+    from linkml_runtime import linkml_model
     if package:
         schema = linkml_model.SchemaDefinition(
             id=f"https://cim.ucaiug.io/ns/{'/'.join(pkg_path_parts)}",
@@ -214,12 +558,12 @@ def build_schema(uml_classes: sqlite3.Cursor, package=None, pkg_path_parts=None)
                 enum_name = class_rows[0]["ClassName"]
                 enum_class = linkml_model.EnumDefinition(
                     name=enum_name,
-                    enum_uri=generate_curie("cim", enum_name),
+                    enum_uri=naming.generate_curie("cim", enum_name),
                     description=class_rows[0]["ClassDescription"],
                     permissible_values={
                         attr["AttrName"]: linkml_model.PermissibleValue(
                             text=attr["AttrName"],
-                            meaning=generate_curie("cim", f"{enum_name}.{attr['AttrName']}"),
+                            meaning=naming.generate_curie("cim", enum_name, attr["AttrName"]),
                         )
                         for attr in class_rows
                         if not (attr["AttrID"] is None and attr["RelID"] is None)
@@ -229,8 +573,8 @@ def build_schema(uml_classes: sqlite3.Cursor, package=None, pkg_path_parts=None)
             case None | _:
                 class_name = class_rows[0]["ClassName"]
                 attributes = {
-                    underscore(uncamelcase(attr["AttrName"])): linkml_model.SlotDefinition(
-                        name=underscore(uncamelcase(attr["AttrName"])),
+                    naming.slot_name(attr["AttrName"]): linkml_model.SlotDefinition(
+                        name=naming.slot_name(attr["AttrName"]),
                         range=(
                             map_primitive_data_type(attr["AttrRange"])
                             if attr["AttrRangeStereotype"] == "Primitive"
@@ -247,7 +591,7 @@ def build_schema(uml_classes: sqlite3.Cursor, package=None, pkg_path_parts=None)
                             if parse_cardinality_value(attr["AttrCardinality"])[1] > 1
                             else False
                         ),
-                        slot_uri=generate_curie("cim", f"{class_name}.{attr['AttrName']}"),
+                        slot_uri=naming.generate_curie("cim", class_name, attr["AttrName"]),
                     )
                     for attr in class_rows
                     if not (attr["AttrID"] is None and attr["RelID"] is None)
@@ -267,65 +611,963 @@ def build_schema(uml_classes: sqlite3.Cursor, package=None, pkg_path_parts=None)
                 class_ = linkml_model.ClassDefinition(
                     name=class_name,
                     is_a=super_class_name,
-                    class_uri=generate_curie("cim", class_name),
+                    class_uri=naming.generate_curie("cim", class_name),
                     attributes=attributes,
                     description=class_rows[0]["ClassDescription"],
                 )
                 schema.classes[class_name] = class_
 
+    schema.imports = schema_imports(
+        (
+            name
+            for class_ in schema.classes.values()
+            for name in (class_.is_a, *(attr.range for attr in class_.attributes.values()))
+        ),
+        class_imports,
+    )
+
     return schema
 
 
-def build_package_path(start_pkg_id, packages, package_path=None):
-    if package_path is None:
-        package_path = []
+def build_schema_dict(
+    uml_classes: Iterable[sqlite3.Row],
+    package=None,
+    pkg_path_parts=None,
+    class_imports: dict[str, str] | None = None,
+) -> dict:
+    # Same schema as `build_schema`, but as plain dicts shaped like the output
+    # of `json_dumper.to_dict`. Keys follow the field order of the LinkML
+    # metamodel classes, and empty values are left for the emitter to drop.
+    schema = {
+        "name": "cim",
+        "title": "CIM",
+        "id": "https://cim.ucaiug.io/ns#CIM",  # TODO: ?
+        "prefixes": {"cim": "https://cim.ucaiug.io/ns#", "linkml": "https://w3id.org/linkml/"},
+        "default_prefix": "cim",
+        "imports": [],
+        "enums": {},
+        "classes": {},
+    }
+    if package:
+        schema["name"] = package["Name"]
+        schema["title"] = package["Name"]
+        schema["id"] = f"https://cim.ucaiug.io/ns/{'/'.join(pkg_path_parts)}"
+
+    for class_id, class_rows in groupby(uml_classes, itemgetter("ClassID")):
+        class_rows = list(class_rows)
+        match class_rows[0]["ClassStereotype"]:
+            case "Primitive":
+                continue
+            case "enumeration":
+                enum_name = class_rows[0]["ClassName"]
+                schema["enums"][enum_name] = {
+                    "name": enum_name,
+                    "description": class_rows[0]["ClassDescription"],
+                    "enum_uri": naming.generate_curie("cim", enum_name),
+                    "permissible_values": {
+                        attr["AttrName"]: {
+                            "text": attr["AttrName"],
+                            "meaning": naming.generate_curie("cim", enum_name, attr["AttrName"]),
+                        }
+                        for attr in class_rows
+                        if not (attr["AttrID"] is None and attr["RelID"] is None)
+                    },
+                }
+            case None | _:
+                class_name = class_rows[0]["ClassName"]
+                attributes = {}
+                super_class_name = None
+                for attr in class_rows:
+                    if attr["AttrID"] is None and attr["RelID"] is None:
+                        continue
+
+                    if attr["AttrRelationType"] == "Generalization":
+                        if super_class_name is None:
+                            super_class_name = attr["AttrRange"]
+                        continue
 
-    package = packages[start_pkg_id]
-    parent_id = package["Parent_ID"]
+                    if attr["AttrName"] is None:
+                        continue
 
-    if parent_id in (0, None):
-        return package_path
+                    slot_name = naming.slot_name(attr["AttrName"])
+                    cardinality = parse_cardinality_value(attr["AttrCardinality"])
+                    attributes[slot_name] = {
+                        "name": slot_name,
+                        "description": attr["AttrDescription"],
+                        "slot_uri": naming.generate_curie("cim", class_name, attr["AttrName"]),
+                        "range": (
+                            map_primitive_data_type(attr["AttrRange"])
+                            if attr["AttrRangeStereotype"] == "Primitive"
+                            else attr["AttrRange"]
+                        ),
+                        "required": True if cardinality[0] > 1 else False,
+                        "multivalued": True if cardinality[1] > 1 else False,
+                    }
 
-    parent = packages[parent_id]
-    return build_package_path(parent["Package_ID"], packages, package_path + [package['Name']])
-    
+                schema["classes"][class_name] = {
+                    "name": class_name,
+                    "description": class_rows[0]["ClassDescription"],
+                    "is_a": super_class_name,
+                    "attributes": attributes,
+                    "class_uri": naming.generate_curie("cim", class_name),
+                }
 
+    schema["imports"] = schema_imports(
+        (
+            name
+            for class_ in schema["classes"].values()
+            for name in (class_["is_a"], *(attr["range"] for attr in class_["attributes"].values()))
+        ),
+        class_imports,
+    )
 
-def write_schema(schema: linkml_model.SchemaDefinition, output: YAMLFilePath):
-    with open(output, "w") as f:
-        f.write(schema_as_yaml_dump(schema))
+    return schema
 
 
-def generate_schema(cim_db: QEAProjectFile, schema_per_package=False) -> None:
-    conn = sqlite3.connect(cim_db)
-    uml_class_rows = list(read_uml_classes(conn))
-    packages_by_id = {pkg_id: next(pkg) for pkg_id, pkg in groupby(read_packages(conn), itemgetter("Package_ID"))}
+class PackageNotFoundError(ValueError):
+    pass
 
-    if schema_per_package:
+
+class PackageTree:
+    def __init__(self, packages_by_id: dict[int, sqlite3.Row | dict]):
+        self.packages_by_id = packages_by_id
+        self._children: dict[int, list[int]] = defaultdict(list)
         for package_id, package in packages_by_id.items():
-            uml_class_rows_in_pkg = [c for c in uml_class_rows if c["ClassPackageID"] == package_id]
+            self._children[package["Parent_ID"]].append(package_id)
 
-            if len(uml_class_rows_in_pkg) == 0:
-                continue
+        # Paths are resolved once, top-down, each extending its parent's path.
+        # Like the model root, packages whose parent is missing start a tree,
+        # but only the root is left out of the paths.
+        self._paths: dict[int, list[str]] = {}
+        stack = []
+        for package_id, package in packages_by_id.items():
+            if package["Parent_ID"] in (0, None):
+                stack.append((package_id, []))
+            elif package["Parent_ID"] not in packages_by_id:
+                stack.append((package_id, [package["Name"]]))
+
+        while stack:
+            package_id, path = stack.pop()
+            self._paths[package_id] = path
+            for child_id in self._children.get(package_id, []):
+                stack.append((child_id, path + [packages_by_id[child_id]["Name"]]))
+
+        # Packages in (or below) a cycle of parent links have no path, and are
+        # left out rather than failing the whole model.
+        if len(self._paths) < len(packages_by_id):
+            unreachable = sorted(package_id for package_id in packages_by_id if package_id not in self._paths)
+            print(f"Skipping packages {unreachable}, which have cyclic parent links.", file=sys.stderr)
+
+    def __contains__(self, package_id: int) -> bool:
+        return package_id in self._paths
+
+    def find(self, path: str) -> int:
+        # `path` is a package path like "TC57CIM/IEC61970/Base/Wires".
+        path_parts = path.strip("/").split("/")
+        for package_id, package_path in self._paths.items():
+            if package_path == path_parts:
+                return package_id
+
+        raise PackageNotFoundError(f"Package `{path}` does not exist.")
+
+    def path(self, package_id: int) -> list[str]:
+        # Names from below the model root down to the package itself.
+        return self._paths[package_id]
+
+    def children(self, package_id: int) -> list[int]:
+        return self._children.get(package_id, [])
+
+    def subtree(self, package_id: int) -> list[int]:
+        # The package and all its descendants, parents before their children.
+        package_ids = []
+        stack = [package_id]
+        while stack:
+            package_id = stack.pop()
+            package_ids.append(package_id)
+            stack.extend(reversed(self.children(package_id)))
+
+        return package_ids
+
+
+def group_rows_by_package(uml_class_rows: Iterable[sqlite3.Row]) -> dict[int, list[sqlite3.Row]]:
+    uml_class_rows_by_package = defaultdict(list)
+    for row in uml_class_rows:
+        uml_class_rows_by_package[row["ClassPackageID"]].append(row)
+
+    return uml_class_rows_by_package
+
+
+def write_if_changed(
+    path: os.PathLike | str, write: Callable[[TextIO | BinaryIO], None], mode: Literal["w", "wb"] = "w"
+) -> bool:
+    # Writes to a temporary file next to `path`, and only replaces `path` if
+    # the contents differ, so unchanged files keep their modification time.
+    # Returns whether `path` was replaced. Files are not synced to disk here;
+    # see `sync_paths`.
+    dirpath, filename = os.path.split(os.path.abspath(path))
+    fd, tmp_path = tempfile.mkstemp(dir=dirpath, prefix=f".{filename}.", suffix=".tmp")
+    try:
+        with os.fdopen(fd, mode) as f:
+            write(f)
+
+        if os.path.exists(path) and filecmp.cmp(tmp_path, path, shallow=False):
+            os.remove(tmp_path)
+            return False
+
+        # `mkstemp` creates files only the owner can read.
+        umask = os.umask(0)
+        os.umask(umask)
+        os.chmod(tmp_path, 0o666 & ~umask)
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+    return True
+
+
+def sync_paths(paths: Iterable[os.PathLike | str]) -> None:
+    # Syncs files, and then their directories (for the renames), once each at
+    # the end of a run instead of after every write.
+    dirpaths = set()
+    for path in paths:
+        fd = os.open(path, os.O_RDONLY)
+        try:
+            os.fsync(fd)
+        finally:
+            os.close(fd)
+        dirpaths.add(os.path.dirname(os.path.abspath(path)))
+
+    if os.name == "nt":  # Directories cannot be opened on Windows.
+        return
+
+    for dirpath in dirpaths:
+        fd = os.open(dirpath, os.O_RDONLY)
+        try:
+            os.fsync(fd)
+        finally:
+            os.close(fd)
+
+
+def remove_with_empty_parents(path: os.PathLike | str, root: OutputDirPath) -> None:
+    os.remove(path)
+
+    dirpath = os.path.dirname(os.path.abspath(path))
+    root = os.path.abspath(root)
+    while dirpath != root and dirpath.startswith(root + os.sep) and not os.listdir(dirpath):
+        os.rmdir(dirpath)
+        dirpath = os.path.dirname(dirpath)
+
+
+def write_schema(
+    schema: "linkml_model.SchemaDefinition | dict", output: YAMLFilePath, with_compiled=False
+) -> bool:
+    # Returns whether `output` changed. With `with_compiled`, the schema is also
+    # written in compiled form (see `compiled.load_schema`), and the result
+    # includes whether that changed.
+    from sparxea2linkml import emitter
+
+    document = {} if with_compiled else None
+    if isinstance(schema, dict):
+        written = write_if_changed(output, partial(emitter.dump_schema_dict, schema, document=document))
+    else:
+        written = write_if_changed(output, partial(emitter.dump_schema, schema, document=document))
+
+    if with_compiled:
+        data = compiled.dumps(document, output)
+        written |= write_if_changed(compiled.compiled_path(output), lambda f: f.write(data), "wb")
+
+    return written
+
+
+def relative_import(pkg_path_parts: list[str], imported_path_parts: list[str]) -> str:
+    # Like `posixpath.relpath` between the directories of both schemas, then
+    # the imported one's name, but without resolving the paths.
+    pkg_dir_parts, imported_dir_parts = pkg_path_parts[:-1], imported_path_parts[:-1]
+    common = 0
+    while (
+        common < min(len(pkg_dir_parts), len(imported_dir_parts))
+        and pkg_dir_parts[common] == imported_dir_parts[common]
+    ):
+        common += 1
+
+    return "/".join(
+        [".."] * (len(pkg_dir_parts) - common) + imported_dir_parts[common:] + imported_path_parts[-1:]
+    )
+
+
+PackageSchemaJob = tuple[
+    tuple[str, ...],  # Class row columns
+    list[tuple],  # Class rows
+    dict,  # Package
+    list[str],  # Package path parts
+    dict[str, str],  # Imports of classes in other packages, by class name
+    YAMLFilePath,
+]
+
+
+def write_package_schema(job: PackageSchemaJob, validate=False) -> tuple[float, float, bool]:
+    # Returns the seconds spent building and writing the schema, so they can be
+    # profiled per package even when this runs in a worker process, and
+    # whether the file changed.
+    columns, uml_class_rows, package, pkg_path_parts, class_imports, output = job
+    uml_class_rows = [dict(zip(columns, row)) for row in uml_class_rows]
+
+    start = time.perf_counter()
+    if validate:
+        schema = build_schema(uml_class_rows, package, pkg_path_parts, class_imports)
+    else:
+        schema = build_schema_dict(uml_class_rows, package, pkg_path_parts, class_imports)
+    built = time.perf_counter()
+    written = write_schema(schema, output)
+
+    return built - start, time.perf_counter() - built, written
+
+
+def hash_package_job(job: PackageSchemaJob, path: str) -> str:
+    # `path` is that of the schema file relative to the output directory, and
+    # hashed instead of the file path, which depends on how the output
+    # directory was given.
+    return hashlib.sha256(repr((*job[:5], path)).encode()).hexdigest()
+
+
+def generator_version() -> str:
+    return f"{cache.tool_version()}-{OUTPUT_FORMAT_VERSION}"
+
+
+def read_manifest(manifest_path: ManifestFilePath) -> dict[str, dict[str, str]]:
+    try:
+        with open(manifest_path) as f:
+            manifest = json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return {}
+
+    if manifest.get("version") != MANIFEST_VERSION:
+        return {}
+
+    # Files written by another converter may differ for the same rows, so
+    # none of them are up to date, but they are still removed when stale.
+    if manifest.get("generator") != generator_version():
+        return {package_id: {**entry, "hash": None} for package_id, entry in manifest["packages"].items()}
+
+    return manifest["packages"]
+
+
+def write_manifest(manifest_path: ManifestFilePath, packages: dict[str, dict[str, str]]) -> bool:
+    return write_if_changed(
+        manifest_path,
+        partial(
+            json.dump,
+            {"version": MANIFEST_VERSION, "generator": generator_version(), "packages": packages},
+            indent=2,
+            sort_keys=True,
+        ),
+    )
+
+
+def read_class_index(index_path: ClassIndexFilePath) -> inheritance.ClassIndex | None:
+    try:
+        with open(index_path) as f:
+            index = json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return None
+
+    if index.get("version") != inheritance.INDEX_VERSION:
+        return None
+
+    return index
+
+
+def write_class_index(index_path: ClassIndexFilePath, index: inheritance.ClassIndex) -> bool:
+    # Compact, since it is read by programs, and can be large for big models.
+    return write_if_changed(index_path, partial(json.dump, index, separators=(",", ":")))
+
+
+def class_index_path(output_path: YAMLFilePath) -> ClassIndexFilePath:
+    # Next to a monolithic schema, like "cim.index.json" for "cim.yml".
+    return os.path.splitext(output_path)[0] + ".index.json"
 
-            pkg_path_parts = build_package_path(package_id, packages_by_id)[::-1]
 
-            if not pkg_path_parts:
+def package_paths(package_tree: PackageTree, package_ids: Iterable[int]) -> dict[int, str]:
+    # Packages that are not in the model (a class may refer to one that was
+    # deleted) or have no path (see `PackageTree`) are left out, and their
+    # classes indexed without one.
+    return {
+        package_id: "/".join(package_tree.path(package_id))
+        for package_id in package_ids
+        if package_id in package_tree
+    }
+
+
+def collect_class_records(
+    uml_class_rows_by_package: Iterable[tuple[int, list[sqlite3.Row | dict]]],
+    class_records: list[inheritance.ClassRecord],
+) -> Iterator[tuple[int, list[sqlite3.Row | dict]]]:
+    # Passes streamed packages on, keeping only the class records of their rows.
+    for package_id, uml_class_rows in uml_class_rows_by_package:
+        class_records.extend(inheritance.class_records(uml_class_rows))
+        yield package_id, uml_class_rows
+
+
+def iter_rows(cursor: sqlite3.Cursor, batch_size: int = FETCH_BATCH_SIZE) -> Iterator[sqlite3.Row]:
+    while rows := cursor.fetchmany(batch_size):
+        yield from rows
+
+
+def plan_package_jobs(
+    uml_class_rows_by_package: Iterable[tuple[int, list[sqlite3.Row | dict]]],
+    packages_by_id: dict[int, sqlite3.Row | dict],
+    package_tree: PackageTree,
+    class_packages: dict[str, int],
+    output_dir: OutputDirPath,
+    previous_manifest: dict[str, dict[str, str]],
+    manifest: dict[str, dict[str, str]],
+    incremental=True,
+) -> Iterator[tuple[int, PackageSchemaJob]]:
+    # Adds every package to `manifest`, but only yields the jobs of packages
+    # that changed since `previous_manifest` (or all of them, if not
+    # `incremental`). `class_packages` is the model's `read_class_packages`.
+    for package_id, uml_class_rows_in_pkg in uml_class_rows_by_package:
+        if len(uml_class_rows_in_pkg) == 0 or package_id not in package_tree:
+            continue
+
+        pkg_path_parts = package_tree.path(package_id)
+
+        if not pkg_path_parts:
+            continue
+
+        pkg_dirpath = os.path.join(output_dir, os.sep.join(pkg_path_parts[:-1]))
+        # LinkML appends `.yaml` to the local imports it resolves.
+        pkg_filename = pkg_path_parts[-1] + ".yaml"
+        pkg_filepath = os.path.join(pkg_dirpath, pkg_filename)
+        # Manifest paths are relative to the output directory, so they compare
+        # equal however (and from wherever) that is given.
+        pkg_relpath = "/".join([*pkg_path_parts[:-1], pkg_filename])
+
+        # The classes a package may refer to are found by the ranges in its
+        # rows, and their packages looked up, so there is no search of other
+        # packages. Imports are relative to the directory of the schema.
+        class_names = {row["ClassName"] for row in uml_class_rows_in_pkg}
+        range_names = sorted({row["AttrRange"] for row in uml_class_rows_in_pkg} - class_names - {None})
+        package_imports = {}
+        class_imports = {}
+        for range_name in range_names:
+            range_package_id = class_packages.get(range_name)
+            if range_package_id is None or range_package_id == package_id:
                 continue
 
-            pkg_dirpath = os.path.join("out", os.sep.join(pkg_path_parts[:-1]))
-            pkg_filename = pkg_path_parts[-1] + ".yml"
-            os.makedirs(pkg_dirpath, exist_ok=True)
+            if range_package_id not in package_imports:
+                range_path_parts = []
+                if range_package_id in package_tree:
+                    range_path_parts = package_tree.path(range_package_id)
+                # The model root has no schema to import.
+                package_imports[range_package_id] = range_path_parts and relative_import(
+                    pkg_path_parts, range_path_parts
+                )
+            if package_imports[range_package_id]:
+                class_imports[range_name] = package_imports[range_package_id]
+
+        # Jobs are plain tuples so they pickle cheaply for worker processes.
+        columns = tuple(uml_class_rows_in_pkg[0].keys())
+        package_job = (
+            columns,
+            list(map(itemgetter(*columns), uml_class_rows_in_pkg)),
+            dict(packages_by_id[package_id]),
+            pkg_path_parts,
+            class_imports,
+            pkg_filepath,
+        )
+        manifest[str(package_id)] = {"hash": hash_package_job(package_job, pkg_relpath), "path": pkg_relpath}
+
+        if (
+            incremental
+            and previous_manifest.get(str(package_id)) == manifest[str(package_id)]
+            and os.path.exists(pkg_filepath)
+        ):
+            continue
+
+        os.makedirs(pkg_dirpath, exist_ok=True)
+        yield package_id, package_job
+
+
+def package_stats(
+    package_id: int, package_job: PackageSchemaJob, result: tuple[float, float, bool]
+) -> profiling.PackageStats:
+    build_seconds, write_seconds, written = result
+    return profiling.PackageStats(
+        package_id=package_id,
+        path=package_job[5],
+        rows=len(package_job[1]),
+        build_schema=build_seconds,
+        write_schema=write_seconds,
+        written=written,
+    )
+
+
+def run_package_jobs(
+    package_jobs: Iterable[tuple[int, PackageSchemaJob]], jobs: int = 1, validate=False
+) -> Iterator[profiling.PackageStats]:
+    # Jobs are taken from `package_jobs` only as workers become free, so that
+    # it can be a stream.
+    if jobs <= 1:
+        for package_id, package_job in package_jobs:
+            yield package_stats(package_id, package_job, write_package_schema(package_job, validate))
+        return
+
+    with ProcessPoolExecutor(max_workers=jobs) as executor:
+        pending = deque()
+        for package_id, package_job in package_jobs:
+            future = executor.submit(write_package_schema, package_job, validate)
+            pending.append((package_id, package_job, future))
+            if len(pending) >= 2 * jobs:
+                package_id, package_job, future = pending.popleft()
+                yield package_stats(package_id, package_job, future.result())
+
+        while pending:
+            package_id, package_job, future = pending.popleft()
+            yield package_stats(package_id, package_job, future.result())
+
+
+def read_model(
+    cim_db: QEAProjectFile,
+    cache_dir: cache.CacheDir | None = None,
+    profiler: profiling.Profiler | None = None,
+    package_path: str | None = None,
+    access: qea.AccessMode = "readonly",
+    with_references=False,
+) -> tuple[list[sqlite3.Row | dict], dict[int, sqlite3.Row | dict], dict[str, int]]:
+    # With `package_path`, only the class rows of that package subtree are read
+    # (and with `with_references`, those of the classes it refers to, see
+    # `read_uml_classes`), but the packages and class packages of the whole model.
+    if profiler is None:
+        profiler = profiling.Profiler()
+
+    if cache_dir is not None:
+        with profiler.stage("load_cache") as stage:
+            cache_kind = "rows"
+            if package_path is not None:
+                cache_kind += "-" + hashlib.sha256(package_path.encode()).hexdigest()[:16]
+                if with_references:
+                    cache_kind += "-references"
+            cache_key = cache.model_cache_key(cim_db, cache_kind)
+            cached_model = cache.load_model(cache_dir, cache_key)
+
+            if cached_model is not None:
+                class_columns, class_rows, package_columns, package_rows, class_packages = cached_model
+                uml_class_rows = [dict(zip(class_columns, row)) for row in class_rows]
+                packages = (dict(zip(package_columns, row)) for row in package_rows)
+                packages_by_id = {package["Package_ID"]: package for package in packages}
+                stage.rows = len(uml_class_rows)
+
+        if cached_model is not None:
+            return uml_class_rows, packages_by_id, class_packages
+
+    with profiler.stage("query") as stage:
+        conn = qea.connect(cim_db, access)
+        package_cursor = read_packages(conn)
+        packages_by_id = {
+            pkg_id: next(pkg) for pkg_id, pkg in groupby(package_cursor, itemgetter("Package_ID"))
+        }
+        package_id = None if package_path is None else PackageTree(packages_by_id).find(package_path)
+        uml_class_cursor = read_uml_classes(conn, package_id, with_references=with_references)
+        uml_class_rows = list(uml_class_cursor)
+        class_packages = read_class_packages(conn)
+        stage.rows = len(uml_class_rows)
+
+    if cache_dir is not None:
+        with profiler.stage("store_cache"):
+            cache.store_model(
+                cache_dir,
+                cache_key,
+                (
+                    tuple(column[0] for column in uml_class_cursor.description),
+                    [tuple(row) for row in uml_class_rows],
+                    tuple(column[0] for column in package_cursor.description),
+                    [tuple(package) for package in packages_by_id.values()],
+                    class_packages,
+                ),
+            )
 
-            schema = build_schema(uml_class_rows_in_pkg, package, pkg_path_parts)
-            write_schema(schema, os.path.join(pkg_dirpath, pkg_filename))
+    return uml_class_rows, packages_by_id, class_packages
+
+
+@dataclass
+class OutputSummary:
+    # Numbers of schema files.
+    written: int = 0
+    unchanged: int = 0
+    deleted: int = 0
+
+
+class PackageOutput:
+    # The per-package schemas of one model in `output_dir`, along with their
+    # manifest and class index. With `package_subtree`, only those packages are
+    # (re)planned, and the manifest entries and classes of all others are kept.
+    def __init__(self, output_dir: OutputDirPath, package_subtree: Iterable[int] | None = None):
+        self.output_dir = output_dir
+        self.manifest_path = os.path.join(output_dir, MANIFEST_FILENAME)
+        self.index_path = os.path.join(output_dir, INDEX_FILENAME)
+        self.previous_manifest = read_manifest(self.manifest_path)
+        self.manifest = {}
+        self.package_subtree = None if package_subtree is None else set(package_subtree)
+
+        if self.package_subtree is not None:
+            subtree = set(map(str, self.package_subtree))
+            self.manifest = {
+                package_id: entry
+                for package_id, entry in self.previous_manifest.items()
+                if package_id not in subtree
+            }
+        self.carried_over = len(self.manifest)
+
+    def plan(
+        self,
+        uml_class_rows_by_package: Iterable[tuple[int, list[sqlite3.Row | dict]]],
+        packages_by_id: dict[int, sqlite3.Row | dict],
+        package_tree: PackageTree,
+        class_packages: dict[str, int],
+        incremental=True,
+    ) -> Iterator[tuple[int, PackageSchemaJob]]:
+        return plan_package_jobs(
+            uml_class_rows_by_package,
+            packages_by_id,
+            package_tree,
+            class_packages,
+            self.output_dir,
+            self.previous_manifest,
+            self.manifest,
+            incremental,
+        )
+
+    def finish(
+        self,
+        package_stats: Iterable[profiling.PackageStats],
+        class_records: Iterable[inheritance.ClassRecord] | None = None,
+        package_tree: PackageTree | None = None,
+    ) -> OutputSummary:
+        # Deletes stale files, writes the manifest and syncs what was written.
+        # With `class_records` (of the planned packages), the class index is
+        # written too, which is not counted in the summary.
+        written_paths = [stats.path for stats in package_stats if stats.written]
+        # Packages skipped by the manifest are unchanged too.
+        summary = OutputSummary(
+            written=len(written_paths),
+            unchanged=len(self.manifest) - self.carried_over - len(written_paths),
+        )
+
+        current_paths = {entry["path"] for entry in self.manifest.values()}
+        for entry in self.previous_manifest.values():
+            path = os.path.join(self.output_dir, entry["path"])
+            if entry["path"] not in current_paths and os.path.exists(path):
+                remove_with_empty_parents(path, self.output_dir)
+                summary.deleted += 1
+
+        os.makedirs(self.output_dir, exist_ok=True)
+        if write_manifest(self.manifest_path, self.manifest):
+            written_paths.append(self.manifest_path)
+        if class_records is not None and self.write_index(class_records, package_tree):
+            written_paths.append(self.index_path)
+        sync_paths(written_paths)
+
+        return summary
+
+    def write_index(self, class_records: Iterable[inheritance.ClassRecord], package_tree: PackageTree) -> bool:
+        # Classes that lost to another of the same name are not in an index,
+        # so one that is removed is only replaced by the next full run.
+        class_records = list(class_records)
+        if self.package_subtree is not None:
+            previous_index = read_class_index(self.index_path)
+            if previous_index is not None:
+                class_records.extend(
+                    record
+                    for record in inheritance.index_records(previous_index)
+                    if record.package_id not in self.package_subtree
+                    and record.package_id in package_tree
+                )
+
+        index = inheritance.build_index(
+            class_records, package_paths(package_tree, {record.package_id for record in class_records})
+        )
+
+        return write_class_index(self.index_path, index)
+
+
+def generate_schema(
+    cim_db: QEAProjectFile,
+    schema_per_package=False,
+    jobs: int = 1,
+    incremental=True,
+    cache_dir: cache.CacheDir | None = None,
+    validate=False,
+    profiler: profiling.Profiler | None = None,
+    output: OutputDirPath | YAMLFilePath | None = None,
+    package_path: str | None = None,
+    stream=False,
+    access: qea.AccessMode = "readonly",
+    with_compiled=False,
+) -> OutputSummary:
+    # With `validate`, schemas are built as `linkml_model` objects, which check
+    # and normalize every definition. Otherwise they are built as plain dicts,
+    # which is much faster and writes the same files.
+    # `output` is a directory in per-package mode ("out" by default), and the
+    # YAML file otherwise ("cim.yml" by default).
+    # With `package_path` (like "TC57CIM/IEC61970/Base/Wires"), only that
+    # package subtree is generated. In per-package mode, the schemas of other
+    # packages are left as they are.
+    # With `stream`, package schemas are written while the rows are still being
+    # read, which bounds memory by the largest package instead of the model.
+    # `access` is how the QEA file is opened (see `qea.connect`).
+    # With `with_compiled`, a monolithic schema is also written in compiled form.
+    if profiler is None:
+        profiler = profiling.Profiler()
+
+    if stream and not schema_per_package:
+        raise ValueError("Only schemas per package can be streamed.")
+    if stream and cache_dir is not None:
+        raise ValueError("Streamed rows are read from the QEA file, not from the cache.")
+    if with_compiled and schema_per_package:
+        raise ValueError("Only monolithic schemas can be compiled.")
+
+    if stream:
+        with profiler.stage("query") as stage:
+            conn = qea.connect(cim_db, access)
+            package_cursor = read_packages(conn)
+            packages_by_id = {
+                pkg_id: next(pkg) for pkg_id, pkg in groupby(package_cursor, itemgetter("Package_ID"))
+            }
+            package_tree = PackageTree(packages_by_id)
+            package_id = None if package_path is None else package_tree.find(package_path)
+            class_packages = read_class_packages(conn)
+            uml_class_cursor = read_uml_classes(conn, package_id, order_by_package=True)
+            stage.rows = len(packages_by_id)
     else:
-        schema = build_schema(uml_class_rows)
-        write_schema(schema, "cim.yml")
+        # A monolithic schema has no imports, so it defines all it refers to.
+        uml_class_rows, packages_by_id, class_packages = read_model(
+            cim_db, cache_dir, profiler, package_path, access, with_references=not schema_per_package
+        )
+        package_tree = PackageTree(packages_by_id)
 
+    if schema_per_package:
+        package_output = PackageOutput(
+            "out" if output is None else output,
+            None if package_path is None else package_tree.subtree(package_tree.find(package_path)),
+        )
 
-if __name__ == "__main__":
-    generate_schema(
-        cim_db="data/iec61970cim17v40_iec61968cim13v13b_iec62325cim03v17b_CIM100.1.1.1.qea",
-        schema_per_package=True
+        if stream:
+            # Rows are grouped as they are fetched, so only one package's rows
+            # (and those of the jobs in flight) are held at a time.
+            with profiler.stage("stream") as stage:
+                class_records = []
+                uml_class_rows_by_package = collect_class_records(
+                    (
+                        (package_id, list(rows))
+                        for package_id, rows in groupby(iter_rows(uml_class_cursor), itemgetter("ClassPackageID"))
+                    ),
+                    class_records,
+                )
+                package_jobs = package_output.plan(
+                    uml_class_rows_by_package, packages_by_id, package_tree, class_packages, incremental
+                )
+                package_stats = list(run_package_jobs(package_jobs, jobs, validate))
+                conn.close()
+                stage.rows = sum(stats.rows for stats in package_stats)
+        else:
+            with profiler.stage("plan") as stage:
+                uml_class_rows_by_package = group_rows_by_package(uml_class_rows)
+                package_jobs = list(
+                    package_output.plan(
+                        (
+                            (package_id, uml_class_rows_by_package.get(package_id, []))
+                            for package_id in packages_by_id
+                        ),
+                        packages_by_id,
+                        package_tree,
+                        class_packages,
+                        incremental,
+                    )
+                )
+                stage.rows = len(uml_class_rows)
+
+            with profiler.stage("packages") as stage:
+                package_stats = list(run_package_jobs(package_jobs, jobs, validate))
+                stage.rows = sum(len(package_job[1]) for _, package_job in package_jobs)
+
+            class_records = inheritance.class_records(uml_class_rows)
+
+        profiler.packages.extend(package_stats)
+        with profiler.stage("finish"):
+            summary = package_output.finish(package_stats, class_records, package_tree)
+    else:
+        with profiler.stage("build_schema") as stage:
+            if validate:
+                schema = build_schema(uml_class_rows)
+            else:
+                schema = build_schema_dict(uml_class_rows)
+            stage.rows = len(uml_class_rows)
+
+        with profiler.stage("write_schema"):
+            output_path = "cim.yml" if output is None else output
+            summary = OutputSummary()
+            if write_schema(schema, output_path, with_compiled):
+                summary.written = 1
+                sync_paths([output_path, compiled.compiled_path(output_path)] if with_compiled else [output_path])
+            else:
+                summary.unchanged = 1
+
+        with profiler.stage("index") as stage:
+            class_records = list(inheritance.class_records(uml_class_rows))
+            index = inheritance.build_index(
+                class_records, package_paths(package_tree, {record.package_id for record in class_records})
+            )
+            if write_class_index(class_index_path(output_path), index):
+                sync_paths([class_index_path(output_path)])
+            stage.rows = len(class_records)
+
+    return summary
+
+
+def hash_package_content(job: PackageSchemaJob) -> str:
+    # Like `hash_package_job`, but of only what the schema is built from, so
+    # that the same package in different models hashes the same: not the
+    # output path, nor database IDs, which differ between models. Of those,
+    # the schema only depends on which rows are of the same class, and on
+    # whether a row has an attribute or relation.
+    columns, rows, package, pkg_path_parts, class_imports, _ = job
+    class_numbers: dict[int, int] = {}
+    normalizers = {
+        "ClassID": lambda class_id: class_numbers.setdefault(class_id, len(class_numbers)),
+        "ClassPackageID": lambda package_id: None,
+        "AttrID": lambda attr_id: attr_id is not None,
+        "RelID": lambda rel_id: rel_id is not None,
+    }
+    normalize = [normalizers.get(column) for column in columns]
+    content = (
+        columns,
+        [
+            tuple(value if f is None else f(value) for f, value in zip(normalize, row, strict=True))
+            for row in rows
+        ],
+        {key: value for key, value in package.items() if key not in ("Package_ID", "Parent_ID")},
+        pkg_path_parts,
+        class_imports,
     )
+
+    return hashlib.sha256(repr(content).encode()).hexdigest()
+
+
+def copy_if_changed(source: YAMLFilePath, target: YAMLFilePath) -> bool:
+    with open(source) as f:
+        contents = f.read()
+
+    return write_if_changed(target, lambda f: f.write(contents))
+
+
+def generate_schemas(
+    cim_dbs: Iterable[QEAProjectFile],
+    jobs: int = 1,
+    incremental=True,
+    cache_dir: cache.CacheDir | None = None,
+    validate=False,
+    profiler: profiling.Profiler | None = None,
+    output: OutputDirPath | None = None,
+    package_path: str | None = None,
+    access: qea.AccessMode = "readonly",
+) -> dict[QEAProjectFile, OutputSummary]:
+    # Per-package schemas of several models, each in a directory of `output`
+    # ("out" by default) named after its file. The models are read
+    # concurrently, and their packages are built in one pool of `jobs` workers.
+    # A package that is identical in several models is only built once, and
+    # then copied.
+    if profiler is None:
+        profiler = profiling.Profiler()
+    output_dir = "out" if output is None else output
+
+    cim_dbs = list(cim_dbs)
+    model_names = [os.path.splitext(os.path.basename(cim_db))[0] for cim_db in cim_dbs]
+    if len(set(model_names)) < len(model_names):
+        raise ValueError("QEA files to convert together must have different names.")
+
+    with profiler.stage("query") as stage:
+        # SQLite releases the GIL while it runs a query, so threads suffice.
+        with ThreadPoolExecutor(max_workers=jobs) as executor:
+            models = list(
+                executor.map(
+                    lambda cim_db: read_model(cim_db, cache_dir, None, package_path, access), cim_dbs
+                )
+            )
+        stage.rows = sum(len(uml_class_rows) for uml_class_rows, _, _ in models)
+
+    with profiler.stage("plan") as stage:
+        package_outputs = []
+        package_jobs_by_model = []
+        package_trees = []
+        class_records_by_model = []
+        for model_name, (uml_class_rows, packages_by_id, class_packages) in zip(model_names, models):
+            package_tree = PackageTree(packages_by_id)
+            package_trees.append(package_tree)
+            class_records_by_model.append(list(inheritance.class_records(uml_class_rows)))
+            package_output = PackageOutput(
+                os.path.join(output_dir, model_name),
+                None if package_path is None else package_tree.subtree(package_tree.find(package_path)),
+            )
+            uml_class_rows_by_package = group_rows_by_package(uml_class_rows)
+            package_jobs = package_output.plan(
+                (
+                    (package_id, uml_class_rows_by_package.get(package_id, []))
+                    for package_id in packages_by_id
+                ),
+                packages_by_id,
+                package_tree,
+                class_packages,
+                incremental,
+            )
+            package_outputs.append(package_output)
+            package_jobs_by_model.append(list(package_jobs))
+        del models
+
+        # The first job of every distinct package is built, the others copied.
+        unique_jobs: dict[str, tuple[int, PackageSchemaJob]] = {}
+        duplicate_jobs: list[tuple[int, str, tuple[int, PackageSchemaJob]]] = []
+        for model_index, package_jobs in enumerate(package_jobs_by_model):
+            for package_id, package_job in package_jobs:
+                content_hash = hash_package_content(package_job)
+                if content_hash in unique_jobs:
+                    duplicate_jobs.append((model_index, content_hash, (package_id, package_job)))
+                else:
+                    unique_jobs[content_hash] = (package_id, package_job)
+        stage.rows = len(unique_jobs)
+
+    with profiler.stage("packages") as stage:
+        package_stats_by_model = [[] for _ in cim_dbs]
+        model_index_by_path = {
+            package_job[5]: model_index
+            for model_index, package_jobs in enumerate(package_jobs_by_model)
+            for _, package_job in package_jobs
+        }
+        for stats in run_package_jobs(unique_jobs.values(), jobs, validate):
+            package_stats_by_model[model_index_by_path[stats.path]].append(stats)
+
+        for model_index, content_hash, (package_id, package_job) in duplicate_jobs:
+            start = time.perf_counter()
+            written = copy_if_changed(unique_jobs[content_hash][1][5], package_job[5])
+            package_stats_by_model[model_index].append(
+                package_stats(package_id, package_job, (0.0, time.perf_counter() - start, written))
+            )
+        stage.rows = len(duplicate_jobs)
+
+    with profiler.stage("finish"):
+        summaries = {}
+        for cim_db, package_output, model_stats, class_records, package_tree in zip(
+            cim_dbs, package_outputs, package_stats_by_model, class_records_by_model, package_trees
+        ):
+            profiler.packages.extend(model_stats)
+            summaries[cim_db] = package_output.finish(model_stats, class_records, package_tree)
+
+    return summaries
+
+
+if __name__ == "__main__":
+    from sparxea2linkml import cli
+
+    sys.exit(cli.main())
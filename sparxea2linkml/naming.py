@@ -0,0 +1,50 @@
+import sys
+import urllib.parse
+from functools import lru_cache
+
+CURIE = str
+UMLCardinality = tuple[int, int]
+MANY = sys.maxsize
+
+# The same names recur throughout a model, so conversions are cached. The
+# caches are bounded, since slot URIs are unique per class.
+CACHE_SIZE = 2**16
+
+
+@lru_cache(maxsize=CACHE_SIZE)
+def slot_name(name: str) -> str:
+    # Imported here, so that only cache misses need `linkml_runtime` loaded.
+    from linkml_runtime.utils.formatutils import uncamelcase, underscore
+
+    return underscore(uncamelcase(name))
+
+
+@lru_cache(maxsize=CACHE_SIZE)
+def quote_name(name: str) -> str:
+    return urllib.parse.quote(name)
+
+
+def generate_curie(prefix: str, *local_name_parts: str) -> CURIE:
+    # Slot URIs like `cim:Class.attribute` are unique, but their parts are not,
+    # so the parts are quoted separately. `.` is never quoted.
+    return f"{prefix}:{'.'.join(quote_name(str(part)) for part in local_name_parts)}"
+
+
+@lru_cache(maxsize=CACHE_SIZE)
+def parse_cardinality(val: str | None) -> UMLCardinality | None:
+    if val is None:
+        return None
+
+    lower, _, upper = val.partition("..")
+
+    if upper == "":
+        upper = lower
+
+    return tuple(map(lambda v: MANY if v in ["n", "*"] else int(v), (lower, upper)))
+
+
+def cache_stats() -> dict[str, dict[str, int]]:
+    return {
+        func.__name__: func.cache_info()._asdict()
+        for func in (slot_name, quote_name, parse_cardinality)
+    }
@@ -0,0 +1,133 @@
+import json
+import os
+import sys
+import time
+import tracemalloc
+from collections.abc import Iterator
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass, field
+from typing import TextIO
+
+from sparxea2linkml import naming
+
+try:
+    import resource
+except ImportError:  # Not available on Windows.
+    resource = None
+
+ReportFilePath = os.PathLike | str
+
+
+@dataclass
+class StageStats:
+    name: str
+    seconds: float = 0.0
+    rows: int | None = None
+    rss_before: int | None = None  # Bytes, at the start of the stage
+    rss_after: int | None = None  # Bytes, at its end
+    peak_rss: int | None = None  # Bytes, of the process so far, so it never goes down
+    peak_traced: int | None = None  # Bytes, only with `trace_memory`
+
+
+@dataclass
+class PackageStats:
+    package_id: int
+    path: str
+    rows: int
+    build_schema: float  # Seconds
+    write_schema: float  # Seconds
+    written: bool = True  # False if the file was already up to date
+
+
+@dataclass
+class Profiler:
+    # Timing a stage costs a few clock and `getrusage` calls, so this can stay
+    # on. Tracing allocations slows everything down and is opt-in.
+    trace_memory: bool = False
+    stages: list[StageStats] = field(default_factory=list)
+    packages: list[PackageStats] = field(default_factory=list)
+
+    def __post_init__(self) -> None:
+        if self.trace_memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+
+    @contextmanager
+    def stage(self, name: str) -> Iterator[StageStats]:
+        stats = StageStats(name)
+        if self.trace_memory:
+            tracemalloc.reset_peak()
+
+        stats.rss_before = current_rss()
+        start = time.perf_counter()
+        try:
+            yield stats
+        finally:
+            stats.seconds = time.perf_counter() - start
+            stats.rss_after = current_rss()
+            stats.peak_rss = peak_rss()
+            if self.trace_memory:
+                stats.peak_traced = tracemalloc.get_traced_memory()[1]
+            self.stages.append(stats)
+
+    def report(self) -> dict:
+        return {
+            "stages": [asdict(stats) for stats in self.stages],
+            "packages": [asdict(stats) for stats in self.packages],
+            "total_seconds": sum(stats.seconds for stats in self.stages),
+            "peak_rss": peak_rss(),
+            "peak_rss_workers": peak_rss(workers=True),
+            # Of this process only, so without the work done by `--jobs` workers.
+            "caches": naming.cache_stats(),
+        }
+
+    def write_report(self, path: ReportFilePath) -> None:
+        with open(path, "w") as f:
+            json.dump(self.report(), f, indent=2)
+
+    def print_summary(self, stream: TextIO = sys.stderr, slowest_packages: int = 10) -> None:
+        for stats in self.stages:
+            rows = " " * 15 if stats.rows is None else f"{stats.rows:>10} rows"
+            rss = ""
+            if stats.rss_after is not None:
+                # What the stage left allocated, which unlike the peak can go down.
+                rss_change = (stats.rss_after - stats.rss_before) / 1024**2
+                rss = f"{stats.rss_after / 1024**2:10.1f} MiB{rss_change:+10.1f} MiB"
+            print(f"{stats.name:<14}{stats.seconds * 1000:10.1f} ms{rows}{rss}", file=stream)
+
+        process_peak_rss = peak_rss()
+        if process_peak_rss is not None:
+            print(f"{'peak RSS':<14}{process_peak_rss / 1024**2:10.1f} MiB, over the whole process", file=stream)
+
+        for name, stats in naming.cache_stats().items():
+            calls = stats["hits"] + stats["misses"]
+            if calls:
+                print(f"{name:<24}{stats['hits'] / calls:8.1%} hits of {calls} calls", file=stream)
+
+        packages = sorted(
+            self.packages, key=lambda stats: stats.build_schema + stats.write_schema, reverse=True
+        )
+        for stats in packages[:slowest_packages]:
+            seconds = stats.build_schema + stats.write_schema
+            print(f"  {stats.path:<60}{seconds * 1000:10.1f} ms{stats.rows:>10} rows", file=stream)
+
+
+def current_rss() -> int | None:
+    # Resident set size of this process now. Only available on Linux.
+    try:
+        with open("/proc/self/statm") as f:
+            resident_pages = int(f.read().split()[1])
+    except (OSError, IndexError, ValueError):
+        return None
+
+    return resident_pages * os.sysconf("SC_PAGE_SIZE")
+
+
+def peak_rss(workers=False) -> int | None:
+    # Peak resident set size of this process, or of its largest child process.
+    if resource is None:
+        return None
+
+    usage = resource.getrusage(resource.RUSAGE_CHILDREN if workers else resource.RUSAGE_SELF)
+
+    # Linux reports kibibytes, macOS bytes.
+    return usage.ru_maxrss if sys.platform == "darwin" else usage.ru_maxrss * 1024
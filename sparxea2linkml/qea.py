@@ -0,0 +1,58 @@
+import os
+import pathlib
+import sqlite3
+from typing import Literal
+
+QEAProjectFile = os.PathLike | str
+
+# - "readonly" opens the file read-only, but still takes shared locks, so EA
+#   can keep writing to it safely.
+# - "immutable" also skips locking and change detection. This is fastest, and
+#   does not lock out a running EA, but only safe if the file does not change
+#   while it is read.
+# - "memory" copies the file into memory first, and reads it from there.
+AccessMode = Literal["readonly", "immutable", "memory"]
+ACCESS_MODES: tuple[AccessMode, ...] = ("readonly", "immutable", "memory")
+
+MMAP_SIZE = 1024**3  # Bytes
+CACHE_SIZE = -256 * 1024  # Negative values are in KiB
+
+
+def qea_uri(path: QEAProjectFile, immutable=False) -> str:
+    uri = pathlib.Path(path).resolve().as_uri() + "?mode=ro"
+    if immutable:
+        uri += "&immutable=1"
+
+    return uri
+
+
+def apply_pragmas(conn: sqlite3.Connection) -> None:
+    # `mmap_size` is capped by SQLite's compile-time limit, and ignored for
+    # in-memory databases. The conversion only creates temp tables, which
+    # `temp_store` keeps in memory as well.
+    conn.execute(f"PRAGMA mmap_size = {MMAP_SIZE}")
+    conn.execute(f"PRAGMA cache_size = {CACHE_SIZE}")
+    conn.execute("PRAGMA temp_store = MEMORY")
+
+
+def connect(path: QEAProjectFile, access: AccessMode = "readonly") -> sqlite3.Connection:
+    if not os.path.isfile(path):
+        # Or SQLite reports a much vaguer "unable to open database file".
+        raise FileNotFoundError(f"QEA file `{path}` does not exist.")
+
+    match access:
+        case "readonly" | "immutable":
+            conn = sqlite3.connect(qea_uri(path, immutable=access == "immutable"), uri=True)
+        case "memory":
+            conn = sqlite3.connect(":memory:")
+            source = sqlite3.connect(qea_uri(path), uri=True)
+            try:
+                source.backup(conn)
+            finally:
+                source.close()
+        case _:
+            raise ValueError(f"Access mode `{access}` is not one of {', '.join(ACCESS_MODES)}.")
+
+    apply_pragmas(conn)
+
+    return conn
@@ -0,0 +1,153 @@
+import os
+import random
+import sqlite3
+import textwrap
+
+from sparxea2linkml import ea_model
+
+PRIMITIVES = ("Boolean", "Date", "DateTime", "Decimal", "Float", "Integer", "String")
+CARDINALITIES = ("0..1", "1", "0..*", "1..*")
+
+
+def create_tables(conn: sqlite3.Connection) -> None:
+    # Only the columns the converter reads; EA itself has many more.
+    conn.executescript(
+        textwrap.dedent(
+            """
+            CREATE TABLE t_package (
+                Package_ID INTEGER PRIMARY KEY,
+                Name TEXT,
+                Parent_ID INTEGER,
+                Notes TEXT
+            );
+            CREATE TABLE t_object (
+                Object_ID INTEGER PRIMARY KEY,
+                Object_Type TEXT,
+                Name TEXT,
+                Package_ID INTEGER,
+                Note TEXT,
+                Stereotype TEXT
+            );
+            CREATE TABLE t_attribute (
+                ID INTEGER PRIMARY KEY,
+                Object_ID INTEGER,
+                Name TEXT,
+                LowerBound TEXT,
+                UpperBound TEXT,
+                Type TEXT,
+                Notes TEXT,
+                Stereotype TEXT
+            );
+            CREATE TABLE t_connector (
+                Connector_ID INTEGER PRIMARY KEY,
+                Connector_Type TEXT,
+                Start_Object_ID INTEGER,
+                End_Object_ID INTEGER,
+                SourceCard TEXT,
+                SourceRole TEXT,
+                SourceRoleNote TEXT,
+                DestCard TEXT,
+                DestRole TEXT,
+                DestRoleNote TEXT,
+                Notes TEXT,
+                Stereotype TEXT
+            );
+            """
+        )
+    )
+
+
+def generate_qea(
+    path: ea_model.QEAProjectFile,
+    classes: int = 1000,
+    attributes_per_class: int = 5,
+    connectors: int = 1000,
+    packages: int = 50,
+    package_depth: int = 4,
+    seed: int = 0,
+) -> None:
+    # Builds a CIM-like model: a package tree of at most `package_depth` levels
+    # below the root, primitives, enumerations, datatypes and plain classes with
+    # `attributes_per_class` attributes each, and associations and
+    # generalizations (always pointing at an earlier class, so there are no
+    # inheritance cycles) between the classes.
+    rnd = random.Random(seed)
+
+    if os.path.exists(path):
+        os.remove(path)
+
+    conn = sqlite3.connect(path)
+    create_tables(conn)
+
+    package_rows = [(1, "Model", 0, None), (2, "TC57CIM", 1, None)]
+    package_depths = {1: 0, 2: 1}
+    for package_id in range(3, packages + 3):
+        parent_id = rnd.choice([p for p, depth in package_depths.items() if 0 < depth < package_depth])
+        package_depths[package_id] = package_depths[parent_id] + 1
+        package_rows.append((package_id, f"Package{package_id}", parent_id, f"Package {package_id}."))
+    conn.executemany("INSERT INTO t_package VALUES (?, ?, ?, ?)", package_rows)
+    leaf_package_ids = [row[0] for row in package_rows[2:]] or [2]
+
+    object_rows = []
+    for name in PRIMITIVES:
+        object_rows.append((len(object_rows) + 1, "Class", name, 2, None, "Primitive"))
+    for i in range(classes):
+        stereotype = rnd.choices([None, "enumeration", "CIMDatatype"], weights=[8, 1, 1])[0]
+        object_rows.append(
+            (
+                len(object_rows) + 1,
+                "Class",
+                f"Class{i}",
+                rnd.choice(leaf_package_ids),
+                f"Description of class {i}.",
+                stereotype,
+            )
+        )
+    class_rows = object_rows[len(PRIMITIVES) :]
+    for package_id, name, *_ in package_rows:
+        object_rows.append((len(object_rows) + 1, "Package", name, package_id, None, None))
+    conn.executemany("INSERT INTO t_object VALUES (?, ?, ?, ?, ?, ?)", object_rows)
+
+    attribute_rows = []
+    type_names = [*PRIMITIVES, *(row[2] for row in class_rows if row[5] != "CIMDatatype")]
+    for object_id, _, _, _, _, stereotype in class_rows:
+        for i in range(attributes_per_class):
+            attribute_rows.append(
+                (
+                    len(attribute_rows) + 1,
+                    object_id,
+                    f"attribute{i}",
+                    rnd.choice(["0", "1"]),
+                    "1",
+                    None if stereotype == "enumeration" else rnd.choice(type_names),
+                    f"Description of attribute {i}.",
+                    None,
+                )
+            )
+    conn.executemany("INSERT INTO t_attribute VALUES (?, ?, ?, ?, ?, ?, ?, ?)", attribute_rows)
+
+    connector_rows = []
+    plain_class_ids = [row[0] for row in class_rows if row[5] is None] or [row[0] for row in class_rows]
+    for connector_id in range(1, connectors + 1):
+        start_object_id, end_object_id = sorted(rnd.sample(plain_class_ids, 2), reverse=True)
+        connector_type = rnd.choices(["Association", "Aggregation", "Generalization"], weights=[6, 1, 2])[0]
+        connector_rows.append(
+            (
+                connector_id,
+                connector_type,
+                start_object_id,
+                end_object_id,
+                rnd.choice(CARDINALITIES),
+                rnd.choice([None, f"Source{connector_id}"]),
+                None,
+                rnd.choice(CARDINALITIES),
+                rnd.choice([None, f"Dest{connector_id}"]),
+                None,
+                f"Description of connector {connector_id}.",
+                None,
+            )
+        )
+    conn.executemany("INSERT INTO t_connector VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)", connector_rows)
+
+    conn.commit()
+    conn.close()
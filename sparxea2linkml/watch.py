@@ -0,0 +1,288 @@
+import os
+import sqlite3
+import sys
+import time
+from collections import defaultdict
+from collections.abc import Iterator
+from dataclasses import dataclass, field
+from itertools import groupby
+from operator import itemgetter
+
+from sparxea2linkml import inheritance, main, profiling, qea
+
+FileState = tuple[tuple[int, int] | None, ...]  # Modification time and size per file
+PackageState = tuple[tuple[str, ...], tuple]  # Path and row
+
+DEFAULT_INTERVAL = 0.5  # Seconds
+
+
+def file_state(cim_db: main.QEAProjectFile) -> FileState:
+    # A write-ahead log may hold changes before they reach the file itself.
+    states = []
+    for path in (cim_db, f"{cim_db}-wal"):
+        try:
+            stat = os.stat(path)
+        except FileNotFoundError:
+            states.append(None)
+        else:
+            states.append((stat.st_mtime_ns, stat.st_size))
+
+    return tuple(states)
+
+
+@dataclass
+class ObjectIndex:
+    # What the class rows of every object are read from. Its digest covers its
+    # own row (with `ModifiedDate`), attributes and connectors. Rows also hold
+    # the names of other objects, looked up by connector or attribute type.
+    packages: dict[int, int] = field(default_factory=dict)
+    names: dict[int, str] = field(default_factory=dict)
+    digests: dict[int, int] = field(default_factory=dict)
+    neighbours: dict[int, set[int]] = field(default_factory=lambda: defaultdict(set))
+    attribute_types: dict[str, set[int]] = field(default_factory=lambda: defaultdict(set))
+
+
+def read_object_index(conn: sqlite3.Connection) -> ObjectIndex:
+    # Whole rows are compared, since EA does not update `ModifiedDate` for every
+    # change that ends up in a schema. Digests only need to be stable within a
+    # process, so the built-in hash suffices.
+    index = ObjectIndex()
+
+    # Rows are tuples, and hashed whole, including the leading columns.
+    attributes = defaultdict(list)
+    for row in conn.execute("SELECT Object_ID, Type, * FROM t_attribute"):
+        attributes[row[0]].append(row)
+        if row[1] is not None:
+            index.attribute_types[row[1]].add(row[0])
+
+    connectors = defaultdict(list)
+    for row in conn.execute("SELECT Start_Object_ID, End_Object_ID, * FROM t_connector"):
+        start_id, end_id = row[0], row[1]
+        connectors[start_id].append(row)
+        connectors[end_id].append(row)
+        index.neighbours[start_id].add(end_id)
+        index.neighbours[end_id].add(start_id)
+
+    for row in conn.execute("SELECT Object_ID, Package_ID, Name, * FROM t_object"):
+        object_id = row[0]
+        index.packages[object_id] = row[1]
+        index.names[object_id] = row[2]
+        index.digests[object_id] = hash((row, tuple(attributes[object_id]), tuple(connectors[object_id])))
+
+    return index
+
+
+def package_states(
+    packages_by_id: dict[int, dict], package_tree: main.PackageTree
+) -> dict[int, PackageState]:
+    return {
+        package_id: (tuple(package_tree.path(package_id)), tuple(package.values()))
+        for package_id, package in packages_by_id.items()
+        if package_id in package_tree
+    }
+
+
+def changed_packages(
+    old_index: ObjectIndex,
+    new_index: ObjectIndex,
+    old_package_states: dict[int, PackageState],
+    new_package_states: dict[int, PackageState],
+) -> set[int]:
+    # Packages whose schemas may have changed: those that were renamed, moved,
+    # added or removed, those of changed objects, and those of the objects
+    # that refer to them. Objects in a changed package count as changed too,
+    # since the schemas importing it must follow its path.
+    changed_package_ids = {
+        package_id
+        for package_id in old_package_states.keys() | new_package_states.keys()
+        if old_package_states.get(package_id) != new_package_states.get(package_id)
+    }
+    changed_objects = {
+        object_id
+        for object_id in old_index.digests.keys() | new_index.digests.keys()
+        if old_index.digests.get(object_id) != new_index.digests.get(object_id)
+    }
+    for index in (old_index, new_index):
+        changed_objects |= {
+            object_id for object_id, package_id in index.packages.items() if package_id in changed_package_ids
+        }
+
+    affected_objects = set(changed_objects)
+    for index in (old_index, new_index):
+        for object_id in changed_objects:
+            affected_objects |= index.neighbours.get(object_id, set())
+            if object_id in index.names:
+                affected_objects |= index.attribute_types.get(index.names[object_id], set())
+
+    package_ids = {
+        index.packages[object_id]
+        for index in (old_index, new_index)
+        for object_id in affected_objects
+        if object_id in index.packages
+    }
+
+    return package_ids | changed_package_ids
+
+
+class ModelWatcher:
+    # Keeps the package index and object digests of a model in memory, so that
+    # after a change only the affected package schemas are read and rebuilt.
+    def __init__(
+        self,
+        cim_db: main.QEAProjectFile,
+        output: main.OutputDirPath | None = None,
+        jobs: int = 1,
+        validate=False,
+        package_path: str | None = None,
+        access: qea.AccessMode = "readonly",
+    ):
+        if access == "immutable":
+            raise ValueError("A watched QEA file changes, so it cannot be read as immutable.")
+
+        self.cim_db = cim_db
+        self.output_dir = "out" if output is None else output
+        self.jobs = jobs
+        self.validate = validate
+        self.package_path = package_path
+        self.access = access
+
+        self.file_state: FileState | None = None
+        self.object_index = ObjectIndex()
+        self.package_states: dict[int, PackageState] = {}
+        self.package_ids: set[int] | None = None  # Of `package_path`
+
+    def generate(self, profiler: profiling.Profiler | None = None) -> main.OutputSummary:
+        # Generates all package schemas, and indexes the model they were read
+        # from. A change made in between is picked up by the next `update`.
+        if profiler is None:
+            profiler = profiling.Profiler()
+
+        file_state_before = file_state(self.cim_db)
+        with profiler.stage("index") as stage:
+            conn = qea.connect(self.cim_db, self.access)
+            try:
+                self.read_index(conn)
+            finally:
+                conn.close()
+            stage.rows = len(self.object_index.digests)
+
+        summary = main.generate_schema(
+            self.cim_db,
+            schema_per_package=True,
+            jobs=self.jobs,
+            validate=self.validate,
+            profiler=profiler,
+            output=self.output_dir,
+            package_path=self.package_path,
+            access=self.access,
+        )
+        self.file_state = file_state_before
+
+        return summary
+
+    def read_index(self, conn: sqlite3.Connection) -> tuple[dict[int, dict], main.PackageTree]:
+        package_cursor = main.read_packages(conn)
+        packages_by_id = {
+            pkg_id: dict(next(pkg)) for pkg_id, pkg in groupby(package_cursor, itemgetter("Package_ID"))
+        }
+        package_tree = main.PackageTree(packages_by_id)
+        self.package_states = package_states(packages_by_id, package_tree)
+        self.object_index = read_object_index(conn)
+
+        if self.package_path is not None:
+            self.package_ids = set(package_tree.subtree(package_tree.find(self.package_path)))
+
+        return packages_by_id, package_tree
+
+    def update(self, profiler: profiling.Profiler | None = None) -> main.OutputSummary | None:
+        # Regenerates the schemas of the packages that changed since the last
+        # `generate` or `update`, or returns None if the file did not change.
+        if profiler is None:
+            profiler = profiling.Profiler()
+
+        new_file_state = file_state(self.cim_db)
+        if new_file_state == self.file_state:
+            return None
+
+        old_index, old_package_states = self.object_index, self.package_states
+        old_package_ids = self.package_ids
+        conn = qea.connect(self.cim_db, self.access)
+        try:
+            with profiler.stage("index") as stage:
+                packages_by_id, package_tree = self.read_index(conn)
+                package_ids = changed_packages(
+                    old_index, self.object_index, old_package_states, self.package_states
+                )
+                if self.package_ids is not None:
+                    package_ids &= self.package_ids | old_package_ids
+                stage.rows = len(package_ids)
+
+            with profiler.stage("query") as stage:
+                selected_ids = package_ids if self.package_ids is None else package_ids & self.package_ids
+                uml_class_rows = list(main.read_uml_classes(conn, package_ids=selected_ids))
+                class_packages = main.read_class_packages(conn)
+                stage.rows = len(uml_class_rows)
+        except BaseException:
+            # Compared against again by the next update.
+            self.object_index, self.package_states = old_index, old_package_states
+            self.package_ids = old_package_ids
+            raise
+        finally:
+            conn.close()
+
+        package_output = main.PackageOutput(self.output_dir, package_ids)
+        with profiler.stage("packages") as stage:
+            uml_class_rows_by_package = main.group_rows_by_package(uml_class_rows)
+            package_jobs = package_output.plan(
+                (
+                    (package_id, uml_class_rows_by_package.get(package_id, []))
+                    for package_id in packages_by_id
+                    if package_id in package_ids
+                ),
+                packages_by_id,
+                package_tree,
+                class_packages,
+            )
+            package_stats = list(main.run_package_jobs(package_jobs, self.jobs, self.validate))
+            stage.rows = len(package_stats)
+
+        profiler.packages.extend(package_stats)
+        with profiler.stage("finish"):
+            summary = package_output.finish(package_stats, inheritance.class_records(uml_class_rows), package_tree)
+        self.file_state = new_file_state
+
+        return summary
+
+
+def watch(
+    watcher: ModelWatcher, interval: float = DEFAULT_INTERVAL
+) -> Iterator[tuple[main.OutputSummary, profiling.Profiler]]:
+    # Yields the result of the first generation, and then of every update,
+    # until interrupted. An update waits until the file stopped changing for
+    # one `interval`, so a save is not read halfway.
+    profiler = profiling.Profiler()
+    yield watcher.generate(profiler), profiler
+
+    previous_state = file_state(watcher.cim_db)
+    failed_state = None
+    while True:
+        time.sleep(interval)
+
+        current_state = file_state(watcher.cim_db)
+        if current_state != previous_state or current_state in (watcher.file_state, failed_state):
+            previous_state = current_state
+            continue
+
+        profiler = profiling.Profiler()
+        try:
+            summary = watcher.update(profiler)
+        except Exception as e:
+            # Like a lock held by EA while it saves, or a model that is invalid
+            # (or one the converter fails on) until the next save. That is only
+            # retried once the file changes.
+            print(f"Could not update from `{watcher.cim_db}`: {e!r}", file=sys.stderr)
+            failed_state = current_state
+            continue
+
+        if summary is not None:
+            yield summary, profiler
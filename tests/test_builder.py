@@ -0,0 +1,115 @@
+import sqlite3
+
+import pytest
+
+from sparxea2linkml import builder, main, synthetic
+
+
+@pytest.fixture(scope="module")
+def qea_path(tmp_path_factory):
+    path = tmp_path_factory.mktemp("model") / "model.qea"
+    synthetic.generate_qea(path, classes=200, connectors=200, packages=10)
+
+    return path
+
+
+@pytest.fixture(scope="module")
+def schema(qea_path):
+    conn = sqlite3.connect(qea_path)
+    schema = main.build_schema_dict(list(main.read_uml_classes(conn)))
+    conn.close()
+
+    return schema
+
+
+@pytest.mark.parametrize("indexes", [False, True])
+def test_definitions_match_monolithic_schema(qea_path, tmp_path, schema, indexes):
+    if indexes:
+        indexed_path = tmp_path / "indexed.qea"
+        with sqlite3.connect(qea_path) as source, sqlite3.connect(indexed_path) as target:
+            source.backup(target)
+            target.executescript(
+                """
+                CREATE INDEX t_object_name ON t_object (Name);
+                CREATE INDEX t_attribute_object ON t_attribute (Object_ID);
+                CREATE INDEX t_connector_start ON t_connector (Start_Object_ID);
+                CREATE INDEX t_connector_end ON t_connector (End_Object_ID);
+                """
+            )
+        qea_path = indexed_path
+
+    # Many batches, so the lookups made for the first one are reused.
+    with builder.SchemaBuilder(qea_path, cache_size=10) as schema_builder:
+        for name, definition in schema["classes"].items():
+            assert schema_builder.get_class(name) == definition
+        for name, definition in schema["enums"].items():
+            assert schema_builder.get_enum(name) == definition
+        assert ("AttributeByObject" in main.temp_tables(schema_builder.conn)) != indexes
+
+
+def test_validated_definitions_match_monolithic_schema(qea_path):
+    conn = sqlite3.connect(qea_path)
+    schema = main.build_schema(list(main.read_uml_classes(conn)))
+    conn.close()
+
+    with builder.SchemaBuilder(qea_path, validate=True) as schema_builder:
+        for name in list(schema.classes)[:20]:
+            assert schema_builder.get_class(name) == schema.classes[name]
+
+
+def test_least_recently_used_definitions_are_evicted(qea_path, schema):
+    first, second, third = list(schema["classes"])[:3]
+    with builder.SchemaBuilder(qea_path, cache_size=2) as schema_builder:
+        schema_builder.get_class(first)
+        schema_builder.get_class(second)
+        schema_builder.get_class(first)
+        schema_builder.get_class(third)  # Evicts `second`
+        schema_builder.get_class(first)
+        schema_builder.get_class(second)
+
+        assert schema_builder.cache_info() == {"hits": 2, "misses": 4, "maxsize": 2, "currsize": 2}
+
+
+def test_unknown_names_raise(qea_path, schema):
+    enum_name = next(iter(schema["enums"]))
+    with builder.SchemaBuilder(qea_path) as schema_builder:
+        with pytest.raises(ValueError, match="Class `Missing` does not exist."):
+            schema_builder.get_class("Missing")
+        # An enum is not a class.
+        with pytest.raises(ValueError, match=f"Class `{enum_name}` does not exist."):
+            schema_builder.get_class(enum_name)
+        with pytest.raises(ValueError, match="Enum `Missing` does not exist."):
+            schema_builder.get_enum("Missing")
+
+
+def ancestors(schema, name: str) -> list[str]:
+    names = []
+    while (name := schema["classes"][name].get("is_a")) is not None:
+        names.append(name)
+
+    return names
+
+
+def test_schema_has_ancestors_and_enum_ranges(qea_path, schema):
+    name = max(schema["classes"], key=lambda name: len(ancestors(schema, name)))
+    class_names = {name, *ancestors(schema, name)}
+    enum_names = {
+        attribute["range"]
+        for class_name in class_names
+        for attribute in schema["classes"][class_name]["attributes"].values()
+        if attribute["range"] in schema["enums"]
+    }
+    assert len(class_names) > 2 and enum_names
+
+    with builder.SchemaBuilder(qea_path) as schema_builder:
+        partial_schema = schema_builder.get_schema([name])
+
+    assert list(partial_schema["classes"]) == [
+        class_name for class_name in schema["classes"] if class_name in class_names
+    ]
+    assert list(partial_schema["enums"]) == [
+        enum_name for enum_name in schema["enums"] if enum_name in enum_names
+    ]
+    assert all(
+        partial_schema["classes"][class_name] == schema["classes"][class_name] for class_name in class_names
+    )
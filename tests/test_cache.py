@@ -0,0 +1,123 @@
+import os
+import threading
+
+import pytest
+
+import sparxea2linkml
+from sparxea2linkml import cache, main, qea, synthetic
+
+
+def test_entry_removed_by_another_run_is_skipped(tmp_path, monkeypatch):
+    cache.store_model(tmp_path, "a", list(range(1000)))
+    cache.store_model(tmp_path, "b", list(range(1000)))
+    remove = os.remove
+
+    def remove_twice(path):
+        # Another run evicting the same entry first.
+        remove(path)
+        remove(path)
+
+    monkeypatch.setattr(cache.os, "remove", remove_twice)
+    cache.evict(tmp_path, max_size=0)
+    monkeypatch.undo()
+
+    assert os.listdir(tmp_path) == []
+
+
+def test_entry_evicted_while_loaded_is_still_returned(tmp_path, monkeypatch):
+    cache.store_model(tmp_path, "a", [1, 2, 3])
+
+    def utime(path):
+        raise FileNotFoundError(path)
+
+    monkeypatch.setattr(cache.os, "utime", utime)
+
+    assert cache.load_model(tmp_path, "a") == [1, 2, 3]
+
+
+def test_failed_store_leaves_no_temporary_file(tmp_path):
+    with pytest.raises(TypeError):
+        cache.store_model(tmp_path, "a", threading.Lock())
+
+    assert os.listdir(tmp_path) == []
+
+
+def test_concurrent_stores_and_loads(tmp_path):
+    errors = []
+
+    def run(worker: int) -> None:
+        try:
+            for i in range(50):
+                cache.store_model(tmp_path, f"{worker}-{i}", list(range(1000)), max_size=20_000)
+                cache.load_model(tmp_path, f"{(worker + 1) % 8}-{i}")
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=run, args=(worker,)) for worker in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert errors == []
+
+
+def entry_path(cache_dir, key) -> str:
+    return os.path.join(cache_dir, key + cache.CACHE_SUFFIX)
+
+
+def test_eviction_is_by_size_least_recently_used_first(tmp_path):
+    for seconds, key in enumerate(["a", "b", "c"], start=1):
+        cache.store_model(tmp_path, key, list(range(1000)))
+        os.utime(entry_path(tmp_path, key), (seconds, seconds))
+    entry_size = os.path.getsize(entry_path(tmp_path, "a"))
+
+    assert cache.load_model(tmp_path, "a") is not None
+    cache.store_model(tmp_path, "d", list(range(1000)), max_size=2 * entry_size)
+
+    assert sorted(os.listdir(tmp_path)) == ["a.pickle", "d.pickle"]
+
+
+def test_corrupt_entry_is_dropped(tmp_path):
+    cache.store_model(tmp_path, "a", list(range(1000)))
+    with open(entry_path(tmp_path, "a"), "r+b") as f:
+        f.truncate(100)
+
+    assert cache.load_model(tmp_path, "a") is None
+    assert os.listdir(tmp_path) == []
+
+
+@pytest.fixture
+def qea_path(tmp_path):
+    path = tmp_path / "model.qea"
+    synthetic.generate_qea(path, classes=100, connectors=100, packages=10)
+
+    return path
+
+
+def no_connect(*args, **kwargs):
+    raise AssertionError("A warm cache should not open the QEA file.")
+
+
+@pytest.mark.parametrize("package_path", [None, "TC57CIM/Package5"])
+def test_warm_run_does_not_read_the_qea_file(qea_path, tmp_path, monkeypatch, package_path):
+    cache_dir = tmp_path / "cache"
+    cold = main.read_model(qea_path, cache_dir, package_path=package_path)
+
+    monkeypatch.setattr(qea, "connect", no_connect)
+    warm = main.read_model(qea_path, cache_dir, package_path=package_path)
+
+    assert [dict(row) for row in warm[0]] == [dict(row) for row in cold[0]]
+    assert {package_id: dict(package) for package_id, package in warm[1].items()} == {
+        package_id: dict(package) for package_id, package in cold[1].items()
+    }
+    assert warm[2] == cold[2]
+
+
+def test_warm_run_of_library_does_not_read_the_qea_file(qea_path, tmp_path, monkeypatch):
+    cache_dir = tmp_path / "cache"
+    uml_classes, uml_relations = sparxea2linkml.read_model(qea_path, cache_dir)
+
+    monkeypatch.setattr(qea, "connect", no_connect)
+
+    assert sparxea2linkml.read_model(qea_path, cache_dir) == (uml_classes, uml_relations)
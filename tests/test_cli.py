@@ -0,0 +1,41 @@
+import sqlite3
+
+import pytest
+
+from sparxea2linkml import cli, synthetic
+
+
+@pytest.mark.parametrize("options", [[], ["--monolithic"]])
+def test_missing_package_is_a_usage_error(tmp_path, capsys, options):
+    qea_path = tmp_path / "model.qea"
+    synthetic.generate_qea(qea_path, classes=10, connectors=10, packages=2)
+
+    with pytest.raises(SystemExit) as exc_info:
+        cli.main([str(qea_path), *options, "--package", "TC57CIM/Missing", "-o", str(tmp_path / "out")])
+
+    assert exc_info.value.code == 2
+    assert "Package `TC57CIM/Missing` does not exist." in capsys.readouterr().err
+
+
+def test_invalid_model_is_not_a_usage_error(tmp_path):
+    qea_path = tmp_path / "model.qea"
+    synthetic.generate_qea(qea_path, classes=10, connectors=10, packages=2)
+    conn = sqlite3.connect(qea_path)
+    conn.execute("UPDATE t_attribute SET UpperBound = 'many'")
+    conn.commit()
+    conn.close()
+
+    with pytest.raises(ValueError, match="invalid literal"):
+        cli.main([str(qea_path), "-o", str(tmp_path / "out")])
+
+
+def test_models_with_the_same_name_are_a_usage_error(tmp_path, capsys):
+    qea_paths = [tmp_path / "a" / "model.qea", tmp_path / "b" / "model.qea"]
+    for qea_path in qea_paths:
+        qea_path.parent.mkdir()
+        synthetic.generate_qea(qea_path, classes=10, connectors=10, packages=2)
+
+    with pytest.raises(SystemExit):
+        cli.main([*map(str, qea_paths), "-o", str(tmp_path / "out")])
+
+    assert "must have different names" in capsys.readouterr().err
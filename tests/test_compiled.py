@@ -0,0 +1,71 @@
+import os
+import pickle
+
+import pytest
+import yaml
+
+from sparxea2linkml import cli, compiled, main, synthetic
+
+
+@pytest.fixture
+def schema_path(tmp_path):
+    qea_path = tmp_path / "model.qea"
+    synthetic.generate_qea(qea_path, classes=100, connectors=100, packages=10)
+    path = tmp_path / "schema.yml"
+    main.generate_schema(qea_path, output=path, with_compiled=True)
+
+    return path
+
+
+def safe_load(path) -> dict:
+    with open(path) as f:
+        return yaml.safe_load(f)
+
+
+def test_compiled_schema_matches_yaml(schema_path):
+    assert os.path.exists(compiled.compiled_path(schema_path))
+    assert not compiled.is_stale(schema_path)
+    assert compiled.load_schema(schema_path) == safe_load(schema_path)
+
+
+def test_stale_compiled_schema_falls_back_to_yaml(schema_path):
+    schema_path.write_text(schema_path.read_text().replace("title: CIM", "title: Changed"))
+
+    assert compiled.is_stale(schema_path)
+    assert compiled.load_schema(schema_path) == safe_load(schema_path)
+    assert compiled.load_schema(schema_path)["title"] == "Changed"
+    # Without checking, the compiled schema is used as it is.
+    assert compiled.load_schema(schema_path, check_stale=False)["title"] == "CIM"
+
+
+def test_missing_compiled_schema_falls_back_to_yaml(schema_path):
+    os.remove(compiled.compiled_path(schema_path))
+
+    assert compiled.is_stale(schema_path)
+    assert compiled.load_schema(schema_path, check_stale=False) == safe_load(schema_path)
+
+
+def test_compiled_schema_of_other_version_falls_back_to_yaml(schema_path):
+    path = compiled.compiled_path(schema_path)
+    with open(path, "rb") as f:
+        document = pickle.load(f)
+    document["version"] = compiled.COMPILED_FORMAT_VERSION + 1
+    document["schema"] = {"name": "other"}
+    with open(path, "wb") as f:
+        pickle.dump(document, f)
+
+    assert compiled.is_stale(schema_path)
+    assert compiled.load_schema(schema_path, check_stale=False) == safe_load(schema_path)
+
+
+def test_compile_requires_monolithic(tmp_path, capsys):
+    qea_path = tmp_path / "model.qea"
+    synthetic.generate_qea(qea_path, classes=10, connectors=10, packages=2)
+
+    with pytest.raises(SystemExit) as exc_info:
+        cli.main([str(qea_path), "--compile", "-o", str(tmp_path / "out")])
+
+    assert exc_info.value.code == 2
+    assert "--compile requires --monolithic." in capsys.readouterr().err
+    with pytest.raises(ValueError, match="Only monolithic schemas can be compiled."):
+        main.generate_schema(qea_path, schema_per_package=True, with_compiled=True)
@@ -0,0 +1,69 @@
+import io
+import sqlite3
+from itertools import groupby
+from operator import itemgetter
+
+import pytest
+from linkml_runtime.utils.schema_as_dict import schema_as_yaml_dump
+
+from sparxea2linkml import emitter, main, synthetic
+
+
+@pytest.fixture(scope="module")
+def model(tmp_path_factory):
+    path = tmp_path_factory.mktemp("model") / "model.qea"
+    synthetic.generate_qea(path, classes=300, connectors=300, packages=20)
+    conn = sqlite3.connect(path)
+    uml_class_rows = list(main.read_uml_classes(conn))
+    packages_by_id = {
+        pkg_id: next(pkg) for pkg_id, pkg in groupby(main.read_packages(conn), itemgetter("Package_ID"))
+    }
+    class_packages = main.read_class_packages(conn)
+    conn.close()
+
+    return uml_class_rows, packages_by_id, class_packages
+
+
+def schema_arguments(model, tmp_path):
+    # The arguments `build_schema` gets for the monolithic schema, and for
+    # every package schema.
+    uml_class_rows, packages_by_id, class_packages = model
+    yield (uml_class_rows,)
+
+    uml_class_rows_by_package = main.group_rows_by_package(uml_class_rows)
+    package_jobs = main.plan_package_jobs(
+        ((package_id, uml_class_rows_by_package.get(package_id, [])) for package_id in packages_by_id),
+        packages_by_id,
+        main.PackageTree(packages_by_id),
+        class_packages,
+        tmp_path,
+        previous_manifest={},
+        manifest={},
+        incremental=False,
+    )
+    for _, (columns, rows, package, pkg_path_parts, class_imports, _) in package_jobs:
+        yield [dict(zip(columns, row)) for row in rows], package, pkg_path_parts, class_imports
+
+
+def dump(dump_schema, schema) -> str:
+    stream = io.StringIO()
+    dump_schema(schema, stream)
+
+    return stream.getvalue()
+
+
+def test_dump_schema_matches_schema_as_yaml_dump(model, tmp_path):
+    schemas = 0
+    for arguments in schema_arguments(model, tmp_path):
+        schema = main.build_schema(*arguments)
+        assert dump(emitter.dump_schema, schema) == schema_as_yaml_dump(schema)
+        schemas += 1
+
+    assert schemas > 10
+
+
+def test_dump_schema_dict_matches_validated_schema(model, tmp_path):
+    for arguments in schema_arguments(model, tmp_path):
+        assert dump(emitter.dump_schema_dict, main.build_schema_dict(*arguments)) == dump(
+            emitter.dump_schema, main.build_schema(*arguments)
+        )
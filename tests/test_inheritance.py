@@ -0,0 +1,99 @@
+import json
+import sqlite3
+
+import pytest
+
+from sparxea2linkml import inheritance, main, synthetic
+
+
+@pytest.fixture
+def qea_path(tmp_path):
+    path = tmp_path / "model.qea"
+    synthetic.generate_qea(path, classes=300, connectors=300, packages=10)
+
+    return path
+
+
+def test_index_matches_schemaview(qea_path, tmp_path):
+    from linkml_runtime.utils.schemaview import SchemaView
+
+    schema_path = tmp_path / "schema.yml"
+    main.generate_schema(qea_path, output=schema_path)
+    index = main.read_class_index(main.class_index_path(schema_path))
+
+    schema_view = SchemaView(str(schema_path))
+    assert index["classes"].keys() == set(schema_view.all_classes())
+    assert any(entry["ancestors"] for entry in index["classes"].values())
+    for name, entry in index["classes"].items():
+        assert entry["ancestors"] == schema_view.class_ancestors(name, reflexive=False)
+        assert list(entry["induced_slots"]) == [slot.name for slot in schema_view.class_induced_slots(name)]
+        for slot, owner in entry["induced_slots"].items():
+            assert slot in schema_view.get_class(owner).attributes
+
+
+def record(class_id: int, name: str, is_a: str | None, slots: list[str]) -> inheritance.ClassRecord:
+    return inheritance.ClassRecord(class_id, name, 1, is_a, slots)
+
+
+def test_is_a_cycles_are_cut():
+    index = inheritance.build_index(
+        [
+            record(1, "A", "B", ["a"]),
+            record(2, "B", "A", ["b"]),
+            record(3, "C", "A", ["c"]),
+            record(4, "D", "D", ["d"]),
+            record(5, "E", "Outside", ["e"]),
+        ],
+        {1: "TC57CIM"},
+    )
+
+    classes = index["classes"]
+    # The chain from A is cut where it would return to A.
+    assert (classes["A"]["ancestors"], classes["B"]["ancestors"]) == (["B"], [])
+    assert classes["A"]["induced_slots"] == {"a": "A", "b": "B"}
+    assert classes["C"]["ancestors"] == ["A", "B"]
+    assert classes["C"]["induced_slots"] == {"c": "C", "a": "A", "b": "B"}
+    assert classes["D"]["ancestors"] == []
+    # Only the name of a parent outside the model is known.
+    assert classes["E"]["ancestors"] == ["Outside"]
+    assert classes["E"]["induced_slots"] == {"e": "E"}
+
+
+def test_subtree_run_merges_with_previous_index(qea_path, tmp_path):
+    output_dir = tmp_path / "out"
+    main.generate_schema(qea_path, schema_per_package=True, output=output_dir)
+
+    # A class in the subtree gains an attribute, and one outside it loses
+    # its attributes, which the subtree run does not see.
+    conn = sqlite3.connect(qea_path)
+    conn.row_factory = sqlite3.Row
+    package_tree = main.PackageTree({package["Package_ID"]: package for package in main.read_packages(conn)})
+    subtree = set(package_tree.subtree(package_tree.find("TC57CIM/Package5")))
+    classes = conn.execute(
+        "SELECT Object_ID, Name, Package_ID FROM t_object WHERE Stereotype IS NULL"
+        " AND Object_ID IN (SELECT Object_ID FROM t_attribute)"
+    ).fetchall()
+    inside_id, inside_name, _ = next(row for row in classes if row["Package_ID"] in subtree)
+    outside_id, outside_name, _ = next(row for row in classes if row["Package_ID"] not in subtree)
+    conn.execute(
+        "INSERT INTO t_attribute VALUES (100000, ?, 'extra', '0', '1', 'String', NULL, NULL)",
+        (inside_id,),
+    )
+    conn.execute("DELETE FROM t_attribute WHERE Object_ID = ?", (outside_id,))
+    conn.commit()
+    conn.close()
+    index_before = main.read_class_index(output_dir / main.INDEX_FILENAME)
+
+    main.generate_schema(qea_path, schema_per_package=True, output=output_dir, package_path="TC57CIM/Package5")
+    index = main.read_class_index(output_dir / main.INDEX_FILENAME)
+
+    assert "extra" in index["classes"][inside_name]["induced_slots"]
+    assert index["classes"][outside_name] == index_before["classes"][outside_name]
+    assert index["classes"].keys() == index_before["classes"].keys()
+
+    # A full run then gives what a run in a new directory gives.
+    main.generate_schema(qea_path, schema_per_package=True, output=output_dir)
+    main.generate_schema(qea_path, schema_per_package=True, output=tmp_path / "new")
+    assert json.loads((output_dir / main.INDEX_FILENAME).read_text()) == json.loads(
+        (tmp_path / "new" / main.INDEX_FILENAME).read_text()
+    )
@@ -0,0 +1,216 @@
+import filecmp
+import json
+import os
+import shutil
+import sqlite3
+import typing
+
+import pytest
+
+from sparxea2linkml import main, profiling, synthetic, watch
+
+
+@pytest.fixture
+def qea_path(tmp_path):
+    path = tmp_path / "model.qea"
+    synthetic.generate_qea(path, classes=100, connectors=100, packages=10)
+
+    return path
+
+
+def test_other_generator_rebuilds_all_packages(qea_path, tmp_path):
+    output_dir = tmp_path / "out"
+    assert main.generate_schema(qea_path, schema_per_package=True, output=output_dir).written > 1
+    schema_path = output_dir / "TC57CIM.yaml"
+    with open(schema_path, "a") as f:
+        f.write("# Written by another version.\n")
+
+    # Up to date according to the manifest.
+    assert main.generate_schema(qea_path, schema_per_package=True, output=output_dir).written == 0
+
+    manifest_path = output_dir / main.MANIFEST_FILENAME
+    manifest = json.loads(manifest_path.read_text())
+    manifest["generator"] = "0.0.0-0"
+    manifest_path.write_text(json.dumps(manifest))
+
+    assert main.generate_schema(qea_path, schema_per_package=True, output=output_dir).written == 1
+    assert "another version" not in schema_path.read_text()
+
+
+def test_output_dir_given_another_way_is_up_to_date(qea_path, tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    written = main.generate_schema(qea_path, schema_per_package=True, output="out").written
+    assert written > 1
+
+    for output_dir in ["./out", str(tmp_path / "out"), "out/"]:
+        summary = main.generate_schema(qea_path, schema_per_package=True, output=output_dir)
+        assert (summary.written, summary.unchanged, summary.deleted) == (0, written, 0)
+
+    manifest = json.loads((tmp_path / "out" / main.MANIFEST_FILENAME).read_text())
+    assert all(not entry["path"].startswith(("out", "/")) for entry in manifest["packages"].values())
+
+
+def test_classes_in_missing_package_are_indexed(qea_path, tmp_path):
+    conn = sqlite3.connect(qea_path)
+    conn.execute("INSERT INTO t_object VALUES (9001, 'Class', 'Orphan', 9001, NULL, NULL)")
+    conn.commit()
+    conn.close()
+
+    schema_path = tmp_path / "schema.yml"
+    assert main.generate_schema(qea_path, output=schema_path).written == 1
+    assert main.read_class_index(main.class_index_path(schema_path)) is not None
+
+    output_dir = tmp_path / "out"
+    watcher = watch.ModelWatcher(qea_path, output_dir)
+    assert watcher.generate().written > 1
+
+    conn = sqlite3.connect(qea_path)
+    conn.execute("UPDATE t_object SET Note = 'Changed.' WHERE Object_ID = 9001")
+    conn.commit()
+    conn.close()
+    watcher.file_state = None
+
+    assert watcher.update() is not None
+
+
+def test_same_packages_with_other_ids_are_built_once(qea_path, tmp_path):
+    other_path = tmp_path / "other.qea"
+    shutil.copy(qea_path, other_path)
+    conn = sqlite3.connect(other_path)
+    conn.executescript(
+        """
+        UPDATE t_package SET Package_ID = Package_ID + 1000, Parent_ID = Parent_ID + 1000 WHERE Parent_ID != 0;
+        UPDATE t_package SET Package_ID = Package_ID + 1000 WHERE Parent_ID = 0;
+        UPDATE t_object SET Object_ID = Object_ID + 1000, Package_ID = Package_ID + 1000;
+        UPDATE t_attribute SET ID = ID + 1000, Object_ID = Object_ID + 1000;
+        UPDATE t_connector SET Connector_ID = Connector_ID + 1000,
+            Start_Object_ID = Start_Object_ID + 1000, End_Object_ID = End_Object_ID + 1000;
+        """
+    )
+    conn.commit()
+    conn.close()
+
+    profiler = profiling.Profiler()
+    output_dir = tmp_path / "out"
+    summaries = main.generate_schemas([qea_path, other_path], profiler=profiler, output=output_dir)
+
+    packages = summaries[other_path].written
+    assert packages > 1
+    # Every package of the other model is a copy.
+    assert next(stage for stage in profiler.stages if stage.name == "packages").rows == packages
+    for schema_path in (output_dir / "model").rglob("*.yaml"):
+        assert filecmp.cmp(schema_path, output_dir / "other" / schema_path.relative_to(output_dir / "model"))
+
+
+def test_monolithic_package_schema_defines_its_references(qea_path, tmp_path):
+    from linkml_runtime.utils.schemaview import SchemaView
+
+    schema_path = tmp_path / "schema.yml"
+    assert main.generate_schema(qea_path, output=schema_path, package_path="TC57CIM/Package5").written == 1
+
+    schema_view = SchemaView(str(schema_path))
+    builtin_types = set(typing.get_args(main.LinkMLTypes))
+    for class_name in schema_view.all_classes():
+        for slot in schema_view.class_induced_slots(class_name):
+            assert slot.range in builtin_types or schema_view.get_element(slot.range) is not None
+
+
+def read_tree(output_dir) -> dict[str, bytes]:
+    return {
+        str(path.relative_to(output_dir)): path.read_bytes() for path in output_dir.rglob("*") if path.is_file()
+    }
+
+
+def test_parallel_output_matches_serial(qea_path, tmp_path):
+    serial = main.generate_schema(qea_path, schema_per_package=True, jobs=1, output=tmp_path / "serial")
+    parallel = main.generate_schema(qea_path, schema_per_package=True, jobs=4, output=tmp_path / "parallel")
+
+    assert parallel == serial
+    assert read_tree(tmp_path / "parallel") == read_tree(tmp_path / "serial")
+
+
+@pytest.mark.parametrize("package_path", [None, "TC57CIM/Package5"])
+def test_streamed_output_matches_read_rows(qea_path, tmp_path, package_path):
+    summaries = [
+        main.generate_schema(
+            qea_path,
+            schema_per_package=True,
+            output=tmp_path / str(stream),
+            package_path=package_path,
+            stream=stream,
+        )
+        for stream in (False, True)
+    ]
+
+    assert summaries[0] == summaries[1]
+    assert main.MANIFEST_FILENAME in read_tree(tmp_path / "True")
+    assert read_tree(tmp_path / "True") == read_tree(tmp_path / "False")
+
+    # And so does a later run of the whole model over it.
+    for stream in (False, True):
+        main.generate_schema(qea_path, schema_per_package=True, output=tmp_path / str(stream), stream=stream)
+    assert read_tree(tmp_path / "True") == read_tree(tmp_path / "False")
+
+
+def test_unchanged_file_keeps_its_modification_time(tmp_path):
+    path = tmp_path / "schema.yml"
+    assert main.write_if_changed(path, lambda f: f.write("name: cim\n"))
+    os.utime(path, ns=(10**18, 10**18))
+
+    assert not main.write_if_changed(path, lambda f: f.write("name: cim\n"))
+    assert path.stat().st_mtime_ns == 10**18
+    assert main.write_if_changed(path, lambda f: f.write("name: other\n"))
+    assert path.stat().st_mtime_ns != 10**18
+    assert os.listdir(tmp_path) == ["schema.yml"]
+
+
+def test_failed_write_leaves_no_temporary_file(tmp_path):
+    path = tmp_path / "schema.yml"
+    path.write_text("name: cim\n")
+
+    def write(f):
+        f.write("name: half")
+        raise OSError("No space left on device")
+
+    with pytest.raises(OSError):
+        main.write_if_changed(path, write)
+
+    assert os.listdir(tmp_path) == ["schema.yml"]
+    assert path.read_text() == "name: cim\n"
+
+
+def read_tree_of_new_run(qea_path, output_dir) -> dict[str, bytes]:
+    main.generate_schema(qea_path, schema_per_package=True, output=output_dir)
+
+    return read_tree(output_dir)
+
+
+def test_renamed_package_replaces_its_schemas(qea_path, tmp_path):
+    output_dir = tmp_path / "out"
+    main.generate_schema(qea_path, schema_per_package=True, output=output_dir)
+    before = read_tree(output_dir)
+
+    # A package with subpackages, so its directory becomes empty.
+    conn = sqlite3.connect(qea_path)
+    package_id, name = conn.execute(
+        "SELECT Package_ID, Name FROM t_package WHERE Package_ID IN (SELECT Parent_ID FROM t_package)"
+        " AND Parent_ID IN (SELECT Package_ID FROM t_package WHERE Name = 'TC57CIM')"
+    ).fetchone()
+    conn.execute("UPDATE t_package SET Name = 'Renamed' WHERE Package_ID = ?", (package_id,))
+    conn.commit()
+    conn.close()
+    assert (output_dir / "TC57CIM" / name).is_dir()
+
+    summary = main.generate_schema(qea_path, schema_per_package=True, output=output_dir)
+    after = read_tree(output_dir)
+
+    assert not (output_dir / "TC57CIM" / name).exists()
+    assert (output_dir / "TC57CIM" / "Renamed").is_dir()
+    assert read_tree(output_dir) == read_tree_of_new_run(qea_path, tmp_path / "new")
+    schema_paths = {path for path in after if path.endswith(".yaml")}
+    deleted = {path for path in before if path.endswith(".yaml")} - schema_paths
+    unchanged = {path for path in schema_paths if before.get(path) == after[path]}
+    assert summary == main.OutputSummary(
+        written=len(schema_paths - unchanged), unchanged=len(unchanged), deleted=len(deleted)
+    )
+    assert summary.deleted > 1 and summary.unchanged > 0
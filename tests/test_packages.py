@@ -0,0 +1,134 @@
+import os
+import sqlite3
+import time
+import typing
+from itertools import groupby
+from operator import itemgetter
+
+import pytest
+
+from sparxea2linkml import main, synthetic
+
+
+def read_synthetic_model(path, packages: int, classes: int):
+    synthetic.generate_qea(path, classes=classes, attributes_per_class=2, connectors=classes // 2, packages=packages)
+    conn = sqlite3.connect(path)
+    uml_class_rows = list(main.read_uml_classes(conn))
+    packages_by_id = {
+        pkg_id: next(pkg) for pkg_id, pkg in groupby(main.read_packages(conn), itemgetter("Package_ID"))
+    }
+    class_packages = main.read_class_packages(conn)
+    conn.close()
+
+    return uml_class_rows, packages_by_id, class_packages
+
+
+def plan(uml_class_rows, packages_by_id, class_packages, output_dir) -> list[tuple[int, main.PackageSchemaJob]]:
+    uml_class_rows_by_package = main.group_rows_by_package(uml_class_rows)
+    return list(
+        main.plan_package_jobs(
+            ((package_id, uml_class_rows_by_package.get(package_id, [])) for package_id in packages_by_id),
+            packages_by_id,
+            main.PackageTree(packages_by_id),
+            class_packages,
+            output_dir,
+            previous_manifest={},
+            manifest={},
+            incremental=False,
+        )
+    )
+
+
+def test_grouped_rows_match_per_package_filter(tmp_path):
+    uml_class_rows, packages_by_id, class_packages = read_synthetic_model(
+        tmp_path / "model.qea", packages=2000, classes=2000
+    )
+    package_tree = main.PackageTree(packages_by_id)
+
+    # What every package got by filtering all rows, before rows were grouped.
+    expected = {}
+    for package_id in packages_by_id:
+        uml_class_rows_in_pkg = [row for row in uml_class_rows if row["ClassPackageID"] == package_id]
+        if uml_class_rows_in_pkg and package_tree.path(package_id):
+            expected[package_id] = [tuple(row) for row in uml_class_rows_in_pkg]
+
+    package_jobs = plan(uml_class_rows, packages_by_id, class_packages, tmp_path / "out")
+
+    assert len(expected) > 1000
+    assert {package_id: package_job[1] for package_id, package_job in package_jobs} == expected
+
+
+def test_planning_scales_linearly(tmp_path):
+    def seconds_per_package(packages: int) -> float:
+        model = read_synthetic_model(tmp_path / f"{packages}.qea", packages=packages, classes=2 * packages)
+        runs = []
+        for run in range(3):
+            start = time.perf_counter()
+            plan(*model, tmp_path / f"out{packages}-{run}")
+            runs.append(time.perf_counter() - start)
+
+        return min(runs) / packages
+
+    # With a pass over all rows per package, 8 times the packages (and rows)
+    # would take 64 times as long.
+    assert seconds_per_package(4000) < 2.5 * seconds_per_package(500)
+
+
+def test_cyclic_packages_are_skipped(tmp_path, capsys):
+    qea_path = tmp_path / "model.qea"
+    synthetic.generate_qea(qea_path, classes=100, connectors=100, packages=10)
+    conn = sqlite3.connect(qea_path)
+    conn.executemany(
+        "INSERT INTO t_package VALUES (?, ?, ?, ?)", [(9001, "Loop", 9002, None), (9002, "Back", 9001, None)]
+    )
+    conn.execute("INSERT INTO t_object VALUES (9001, 'Class', 'Looped', 9001, NULL, NULL)")
+    conn.commit()
+    conn.close()
+
+    output_dir = tmp_path / "out"
+    assert main.generate_schema(qea_path, schema_per_package=True, output=output_dir).written > 1
+    assert "[9001, 9002]" in capsys.readouterr().err
+    assert not list(output_dir.rglob("Loop*")) and not list(output_dir.rglob("Back*"))
+
+    assert main.generate_schema(qea_path, output=tmp_path / "schema.yml").written == 1
+
+
+@pytest.mark.parametrize(
+    "pkg_path_parts, imported_path_parts, expected",
+    [
+        (["TC57CIM", "Wires"], ["TC57CIM", "Core"], "Core"),
+        (["TC57CIM", "Base", "Wires"], ["TC57CIM", "Base"], "../Base"),
+        (["TC57CIM", "Base", "Wires", "Switches"], ["TC57CIM"], "../../../TC57CIM"),
+        (["TC57CIM"], ["TC57CIM", "Base", "Wires"], "TC57CIM/Base/Wires"),
+        (["TC57CIM", "Base", "Wires"], ["TC57CIM", "Base", "Wires", "Switches"], "Wires/Switches"),
+        (["TC57CIM", "Base", "Wires"], ["TC57CIM", "Market", "Bids"], "../Market/Bids"),
+    ],
+)
+def test_relative_import(pkg_path_parts, imported_path_parts, expected):
+    assert main.relative_import(pkg_path_parts, imported_path_parts) == expected
+
+
+def test_package_schemas_load_with_their_imports(tmp_path):
+    from linkml_runtime.utils.schemaview import SchemaView
+
+    qea_path = tmp_path / "model.qea"
+    model = read_synthetic_model(qea_path, packages=10, classes=200)
+    output_dir = tmp_path / "out"
+    main.generate_schema(qea_path, schema_per_package=True, output=output_dir)
+
+    builtin_types = set(typing.get_args(main.LinkMLTypes))
+    package_jobs = plan(*model, output_dir)
+    assert len(package_jobs) > 5
+    for package_id, (_, _, _, pkg_path_parts, class_imports, pkg_filepath) in package_jobs:
+        pkg_dirpath = os.path.dirname(pkg_filepath)
+        imported_paths = {os.path.normpath(os.path.join(pkg_dirpath, path)) for path in class_imports.values()}
+        # Neither itself, nor the model root, which has no schema.
+        assert os.path.splitext(pkg_filepath)[0] not in imported_paths
+        assert all(os.path.exists(path + ".yaml") for path in imported_paths)
+
+        schema_view = SchemaView(pkg_filepath)
+        # Loads (and fails on) every import, transitively.
+        assert len(schema_view.imports_closure()) >= len(imported_paths)
+        for class_name in schema_view.all_classes(imports=False):
+            for slot in schema_view.class_induced_slots(class_name):
+                assert slot.range in builtin_types or schema_view.get_element(slot.range) is not None
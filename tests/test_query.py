@@ -0,0 +1,114 @@
+import sqlite3
+
+import pytest
+
+from sparxea2linkml import benchmark, main, synthetic
+
+
+def create_edge_case_qea(path) -> None:
+    # Classes with duplicate names (whose first one, in rowid order, is the
+    # one ranges are looked up by), self-associations with equal and unequal
+    # ends, and a generalization of a class to itself.
+    conn = sqlite3.connect(path)
+    synthetic.create_tables(conn)
+    conn.executemany(
+        "INSERT INTO t_package VALUES (?, ?, ?, ?)", [(1, "Model", 0, None), (2, "TC57CIM", 1, None)]
+    )
+    conn.executemany(
+        "INSERT INTO t_object VALUES (?, ?, ?, ?, ?, ?)",
+        [
+            (1, "Class", "String", 2, None, "Primitive"),
+            (2, "Class", "Terminal", 2, "A terminal.", None),
+            (3, "Class", "Kind", 2, None, "enumeration"),
+            (4, "Class", "Kind", 2, "Same name, other stereotype.", "CIMDatatype"),
+            (5, "Class", "Equipment", 2, None, None),
+            (6, "Class", "Terminal", 2, "Same name, no stereotype.", None),
+            (7, "Package", "TC57CIM", 2, None, None),
+        ],
+    )
+    conn.executemany(
+        "INSERT INTO t_attribute VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+        [
+            (1, 2, "name", "0", "1", "String", None, None),
+            (2, 2, "kind", "1", "1", "Kind", "Looked up by name.", None),
+            (3, 3, "first", None, None, None, None, None),
+            (4, 5, "kind", "0", "*", "Kind", None, "Stereotyped"),
+            (5, 6, "kind", "0", "1", "Missing", None, None),
+        ],
+    )
+    conn.executemany(
+        "INSERT INTO t_connector VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+        [
+            # Equal ends, by role and by the class name they fall back to.
+            (1, "Association", 2, 2, "0..1", "peer", None, "0..1", "peer", None, None, None),
+            (2, "Association", 5, 5, "0..*", None, None, "0..*", None, None, "Unnamed.", None),
+            # Unequal ends, by role and by cardinality.
+            (3, "Association", 2, 2, "0..1", "parent", None, "0..*", "child", None, None, None),
+            (4, "Aggregation", 5, 5, "1", None, None, "0..*", None, None, None, None),
+            (5, "Generalization", 5, 5, None, None, None, None, None, None, None, None),
+            (6, "Generalization", 6, 5, None, None, None, None, None, None, None, None),
+            (7, "Association", 2, 5, "1..*", "Terminals", None, "0..1", None, None, None, "Stereotyped"),
+            (8, "Association", 4, 99, "1", None, None, "1", None, None, None, None),
+        ],
+    )
+    conn.commit()
+    conn.close()
+
+
+@pytest.fixture(params=["edge_cases", "synthetic"])
+def qea_path(request, tmp_path):
+    path = tmp_path / "model.qea"
+    if request.param == "edge_cases":
+        create_edge_case_qea(path)
+    else:
+        synthetic.generate_qea(path, classes=300, connectors=400, packages=20)
+
+    return path
+
+
+@pytest.mark.parametrize("name_index", [False, True])
+def test_rows_match_subquery_version(qea_path, name_index):
+    conn = sqlite3.connect(qea_path)
+    if name_index:
+        conn.execute("CREATE INDEX t_object_name ON t_object (Name)")
+    assert ("Name" in main.indexed_columns(conn, "t_object")) == name_index
+
+    expected = [tuple(row) for row in conn.execute(benchmark.SUBQUERY_UML_CLASSES_QUERY)]
+    rows = [tuple(row) for row in main.read_uml_classes(conn)]
+    conn.close()
+
+    assert rows == expected
+
+
+def test_benchmark_query(qea_path):
+    timings = benchmark.benchmark_query(qea_path, repeat=1)
+
+    assert set(timings) == {"subqueries", "joins"}
+    assert all(seconds > 0 for seconds in timings.values())
+
+
+@pytest.mark.parametrize("name_index", [False, True])
+def test_subtree_with_references_is_closed(tmp_path, name_index):
+    qea_path = tmp_path / "model.qea"
+    synthetic.generate_qea(qea_path, classes=300, connectors=400, packages=20)
+    conn = sqlite3.connect(qea_path)
+    if name_index:
+        conn.execute("CREATE INDEX t_object_name ON t_object (Name)")
+    rows_by_class = {}
+    for row in main.read_uml_classes(conn):
+        rows_by_class.setdefault(row["ClassID"], []).append(tuple(row))
+    package_id = conn.execute("SELECT Package_ID FROM t_package WHERE Name = 'Package5'").fetchone()[0]
+
+    selected_rows_by_class = {}
+    for row in main.read_uml_classes(conn, package_id, with_references=True):
+        selected_rows_by_class.setdefault(row["ClassID"], []).append(tuple(row))
+    subtree_class_ids = {row["ClassID"] for row in main.read_uml_classes(conn, package_id)}
+    conn.close()
+
+    assert subtree_class_ids < selected_rows_by_class.keys()
+    assert all(rows == rows_by_class[class_id] for class_id, rows in selected_rows_by_class.items())
+    # Every range (and parent) that is a class of the model is read.
+    class_names = {rows[0][1] for rows in rows_by_class.values()}
+    selected_names = {rows[0][1] for rows in selected_rows_by_class.values()}
+    ranges = {row[9] for rows in selected_rows_by_class.values() for row in rows}
+    assert ranges & class_names <= selected_names
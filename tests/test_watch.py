@@ -0,0 +1,105 @@
+import os
+import sqlite3
+
+import pytest
+
+from sparxea2linkml import main, synthetic, watch
+
+
+def touch(path, seconds: int) -> None:
+    os.utime(path, ns=(seconds * 10**9, seconds * 10**9))
+
+
+def test_failed_update_is_retried_once_the_file_changes(tmp_path, monkeypatch, capsys):
+    qea_path = tmp_path / "model.qea"
+    synthetic.generate_qea(qea_path, classes=10, connectors=10, packages=2)
+    watcher = watch.ModelWatcher(qea_path, tmp_path / "out")
+    updates = []
+
+    def update(profiler=None):
+        updates.append(watch.file_state(qea_path))
+        if len(updates) == 1:
+            # An error the converter raises for a model saved halfway, which is
+            # saved again.
+            touch(qea_path, 2_000_000_000)
+            raise TypeError("unsupported operand")
+
+        return main.OutputSummary()
+
+    monkeypatch.setattr(watcher, "update", update)
+    watching = watch.watch(watcher, interval=0.01)
+    next(watching)
+    touch(qea_path, 1_000_000_000)
+
+    assert next(watching)[0] == main.OutputSummary()
+    assert len(updates) == 2 and updates[0] != updates[1]
+    assert "TypeError('unsupported operand')" in capsys.readouterr().err
+
+
+def read_tree(output_dir) -> dict[str, bytes]:
+    return {
+        str(path.relative_to(output_dir)): path.read_bytes() for path in output_dir.rglob("*") if path.is_file()
+    }
+
+
+def leaf_package(conn) -> tuple[int, str]:
+    return conn.execute(
+        "SELECT Package_ID, Name FROM t_package WHERE Package_ID NOT IN (SELECT Parent_ID FROM t_package)"
+        " AND Package_ID IN (SELECT Package_ID FROM t_object) ORDER BY Package_ID DESC"
+    ).fetchone()
+
+
+def edit_attribute(conn) -> None:
+    conn.execute("UPDATE t_attribute SET Name = 'edited', UpperBound = '*' WHERE ID = 1")
+
+
+def rename_class(conn) -> None:
+    # Also changes the ranges (and imports) of the classes referring to it.
+    conn.execute(
+        "UPDATE t_object SET Name = 'Renamed' WHERE Object_ID = (SELECT MIN(Object_ID) FROM t_object"
+        " WHERE Stereotype IS NULL AND Name IN (SELECT Type FROM t_attribute))"
+    )
+
+
+def move_package(conn) -> None:
+    package_id, _ = leaf_package(conn)
+    conn.execute(
+        "UPDATE t_package SET Parent_ID = (SELECT Package_ID FROM t_package WHERE Name = 'TC57CIM')"
+        " WHERE Package_ID = ?",
+        (package_id,),
+    )
+
+
+def delete_package(conn) -> None:
+    package_id, _ = leaf_package(conn)
+    object_ids = "SELECT Object_ID FROM t_object WHERE Package_ID = :package_id"
+    conn.execute(f"DELETE FROM t_attribute WHERE Object_ID IN ({object_ids})", {"package_id": package_id})
+    conn.execute(
+        f"DELETE FROM t_connector WHERE Start_Object_ID IN ({object_ids}) OR End_Object_ID IN ({object_ids})",
+        {"package_id": package_id},
+    )
+    conn.execute("DELETE FROM t_object WHERE Package_ID = ?", (package_id,))
+    conn.execute("DELETE FROM t_package WHERE Package_ID = ?", (package_id,))
+
+
+@pytest.mark.parametrize("edit", [edit_attribute, rename_class, move_package, delete_package])
+def test_update_matches_full_run(tmp_path, edit):
+    qea_path = tmp_path / "model.qea"
+    synthetic.generate_qea(qea_path, classes=100, connectors=100, packages=10)
+    watcher = watch.ModelWatcher(qea_path, tmp_path / "out")
+    watcher.generate()
+    before = read_tree(tmp_path / "out")
+
+    conn = sqlite3.connect(qea_path)
+    edit(conn)
+    conn.commit()
+    conn.close()
+    # Edits may be quicker than the resolution of modification times.
+    watcher.file_state = None
+
+    summary = watcher.update()
+    main.generate_schema(qea_path, schema_per_package=True, output=tmp_path / "full")
+
+    assert summary is not None and summary.written > 0
+    assert read_tree(tmp_path / "out") != before
+    assert read_tree(tmp_path / "out") == read_tree(tmp_path / "full")